@@ -1,5 +1,5 @@
-from clash.game import Player
-import random
+from clash.game import Player, ELIXIR_PER_SECOND
+from clash.scheduler import DecisionScheduler, ElixirAtLeast
 
 class Agent(Player):
     def __init__(self, game, isFocused):
@@ -7,18 +7,28 @@ class Agent(Player):
 
         self.choice = 0# random.randrange(0, 3)
 
+        # Nothing to do until the chosen card is affordable, so only get ticked then
+        self.scheduler = DecisionScheduler()
+
     # Best ai of all time fr
     def Tick(self, dt):
         #return
         if self.elixir >= self.deck[self.choice].cost:
-            xPos, yPos = random.randrange(50, 400), random.randrange(80, 291)
+            xPos, yPos = self.rng.randrange(50, 400), self.rng.randrange(80, 291)
 
             if self.isFocused:
                 yPos = 600 - yPos
 
             self.PlaceCard(xPos, yPos, self.choice)
 
-            self.choice = random.randrange(0, 3)
+            self.choice = self.rng.randrange(0, 3)
+
+        self.scheduler.Wake(ElixirAtLeast(self.deck[self.choice].cost))
+
+    def WakeTime(self) -> float:
+        card = self.deck[self.choice]
+
+        return self.game.lifetime + max(0, card.cost - self.elixir) / ELIXIR_PER_SECOND
 
 class RedAgent(Player):
     def __init__(self, game, isFocused):
@@ -40,6 +50,12 @@ class BlueAgent(Player):
 
             self.done = True
 
+    def WakeTime(self) -> float:
+        return float("inf") if self.done else super().WakeTime()
+
 class NoAgent(Player):
     def __init__(self, game, isFocused):
-        super().__init__(game, isFocused)
\ No newline at end of file
+        super().__init__(game, isFocused)
+
+    def WakeTime(self) -> float:
+        return float("inf")
\ No newline at end of file
@@ -0,0 +1,38 @@
+from clash.batch import RunBatch
+from agent import *
+import argparse
+import json
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless games across a process pool")
+    parser.add_argument("--blue", default="Agent", help="Agent class from agent.py for the blue side")
+    parser.add_argument("--red", default="Agent", help="Agent class from agent.py for the red side")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="Defaults to the number of cores")
+    parser.add_argument("--seed", type=int, default=0, help="Game i is seeded with seed + i")
+    parser.add_argument("--out", default=None, help="Write per-game results to this JSON file")
+    parser.add_argument("--fast-forward", action="store_true", help="Skip ahead whenever the board is empty and nobody can play")
+    parser.add_argument("--profile", default=None, help="Time each phase of the tick and write the totals to this JSON file")
+    parser.add_argument("--flamegraph", default=None, help="Also write the phase timings as collapsed stacks for flamegraph.pl")
+    args = parser.parse_args()
+
+    result = RunBatch(globals()[args.blue], globals()[args.red], args.games, args.workers, args.seed,
+                      profile=bool(args.profile or args.flamegraph), fastForward=args.fast_forward)
+
+    print(result.Summary())
+
+    if result.profile:
+        print(result.profile.Summary())
+
+        if args.profile:
+            result.profile.ToJSON(args.profile)
+
+        if args.flamegraph:
+            result.profile.ToCollapsed(args.flamegraph)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump([g.ToDict() for g in result.games], f, indent=1)
+
+if __name__ == "__main__":
+    main()
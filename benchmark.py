@@ -0,0 +1,44 @@
+from clash.benchmark import *
+import argparse
+import os
+import sys
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the simulator on fixed, seeded scenarios and compare against a baseline")
+    parser.add_argument("scenarios", nargs="*", help=f"Any of {', '.join(SCENARIOS_BY_NAME)}, defaults to all of them")
+    parser.add_argument("--repeats", type=int, default=3, help="Each scenario's best time out of this many runs is kept")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Fraction slower than the baseline that counts as a regression")
+    parser.add_argument("--save", action="store_true", help="Overwrite the baseline with these results")
+    args = parser.parse_args()
+
+    results = RunSuite(args.scenarios, args.repeats)
+
+    for result in results:
+        print(result.Summary())
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        SaveBaseline(results, args.baseline)
+
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save to make one")
+        return
+
+    regressions = FindRegressions(results, LoadBaseline(args.baseline), args.threshold)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    if regressions:
+        sys.exit(1)
+
+    print("No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+from multiprocessing import Pool
+from typing import List, Optional
+from clash.game import Game, FIXED_DT
+from clash.profiler import TickProfiler
+import time
+import os
+
+class GameResult():
+    def __init__(self, index, seed, winner, lifetime, ticks, blueTowerHealth, redTowerHealth, duration, profile=None):
+        self.index = index
+        self.seed = seed
+
+        # "blue", "red" or None for a timeout
+        self.winner: Optional[str] = winner
+
+        self.lifetime = lifetime
+        self.ticks = ticks
+
+        self.blueTowerHealth = blueTowerHealth
+        self.redTowerHealth = redTowerHealth
+
+        # Wall time spent simulating in the worker
+        self.duration = duration
+
+        # TickProfiler.ToDict() of this game when the batch was profiled
+        self.profile = profile
+
+    def ToDict(self) -> dict:
+        result = dict(self.__dict__)
+        del result["profile"]
+
+        return result
+
+class BatchResult():
+    def __init__(self, games: List[GameResult], wallTime: float, workers: int):
+        self.games = games
+        self.wallTime = wallTime
+        self.workers = workers
+
+        self.gamesPerSecond = len(games) / wallTime if wallTime > 0 else 0
+        self.ticksPerSecond = sum(g.ticks for g in games) / wallTime if wallTime > 0 else 0
+
+        self.blueWins = sum(1 for g in games if g.winner == "blue")
+        self.redWins = sum(1 for g in games if g.winner == "red")
+        self.draws = len(games) - self.blueWins - self.redWins
+
+        # Every game's phase timings added together, None unless the batch was profiled
+        self.profile = None
+
+        for g in games:
+            if g.profile is not None:
+                if self.profile is None:
+                    self.profile = TickProfiler()
+
+                self.profile.Merge(g.profile)
+
+    def Summary(self) -> str:
+        return (f"{len(self.games)} games on {self.workers} workers in {round(self.wallTime, 2)}s "
+                f"({round(self.gamesPerSecond, 2)} games/s, {int(self.ticksPerSecond)} ticks/s) - "
+                f"blue {self.blueWins}, red {self.redWins}, draw {self.draws}")
+
+# Runs a single headless game, this is what each worker process executes
+def RunGame(job) -> GameResult:
+    index, seed, blueClass, redClass, dt, profile, fastForward = job
+
+    startTime = time.perf_counter()
+
+    game = Game(blueClass, redClass, verbose=False, seed=seed, fastForward=fastForward)
+
+    if profile:
+        game.profiler = TickProfiler()
+
+    while game.running:
+        game.Tick(dt)
+
+    duration = time.perf_counter() - startTime
+
+    blue, red = game.players
+
+    winner = None
+    if game.winner == blue:
+        winner = "blue"
+    elif game.winner == red:
+        winner = "red"
+
+    blueTowerHealth = sum(max(0, t.health) for t in game.towers if t.owner == blue)
+    redTowerHealth = sum(max(0, t.health) for t in game.towers if t.owner == red)
+
+    profile = game.profiler.ToDict() if game.profiler else None
+
+    return GameResult(index, seed, winner, game.lifetime, game.ticks, blueTowerHealth, redTowerHealth, duration, profile)
+
+# Agent classes have to be importable at module level so they can be pickled to the workers
+def RunBatch(blueClass, redClass, numGames: int, workers: Optional[int] = None, baseSeed: int = 0, dt: float = FIXED_DT,
+             profile: bool = False, fastForward: bool = False) -> BatchResult:
+    workers = workers or os.cpu_count() or 1
+
+    jobs = [(i, baseSeed + i, blueClass, redClass, dt, profile, fastForward) for i in range(numGames)]
+
+    startTime = time.perf_counter()
+
+    if workers == 1:
+        results = [RunGame(job) for job in jobs]
+    else:
+        with Pool(workers) as pool:
+            # Hand out a few games at a time so workers don't sit idle at the end
+            chunkSize = max(1, numGames // (workers * 8))
+
+            results = list(pool.imap_unordered(RunGame, jobs, chunksize=chunkSize))
+
+    wallTime = time.perf_counter() - startTime
+
+    results.sort(key=lambda r: r.index)
+
+    return BatchResult(results, wallTime, workers)
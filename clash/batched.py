@@ -0,0 +1,211 @@
+from clash.vectorized import *
+from clash.spaces import *
+import numpy as np
+
+_CARDS = [cardClass() for cardClass in DECK]
+
+CARD_COST = np.array([card.cost for card in _CARDS], np.float64)
+CARD_COUNT = np.array([card.count for card in _CARDS], np.int64)
+CARD_IS_SPELL = np.array([card.troop is Fireball for card in _CARDS])
+CARD_UNIT_TYPE = np.array([0 if card.troop is Fireball else UNIT_TYPE_BY_CLASS[card.troop].value for card in _CARDS], np.int64)
+
+# K independent games stepped in lockstep through one SimState, the row is the game index.
+# Blue (player 0) is driven by step(actions), red by opponentActions or a built in random
+# agent that plays like agent.Agent.
+class BatchedGame():
+    def __init__(self, games: int, seed: Optional[int] = None, dt: float = FIXED_DT, frameSkip: int = 1):
+        self.games = games
+        self.dt = dt
+
+        # Ticks simulated per step, actions only apply on the first one
+        self.frameSkip = frameSkip
+
+        self.rng = np.random.default_rng(seed)
+        self.state = SimState(games)
+
+        self.elixir = np.zeros((games, 2))
+        self.decks = np.zeros((games, 2, len(DECK)), np.int64)
+        self.lifetime = np.zeros(games)
+        self.opponentChoice = np.zeros(games, np.int64)
+
+        self.allRows = np.arange(games)
+
+        self.ResetGames(self.allRows)
+
+    def ResetGames(self, rows) -> None:
+        rows = np.asarray(rows, np.int64)
+
+        self.state.ResetRows(rows)
+
+        self.elixir[rows] = STARTING_ELIXIR
+        self.lifetime[rows] = 0
+        self.opponentChoice[rows] = 0
+
+        self.decks[rows] = self.rng.permuted(np.broadcast_to(np.arange(len(DECK)), (len(rows), 2, len(DECK))), axis=2)
+
+    def reset(self):
+        self.ResetGames(self.allRows)
+
+        return self.Observe(0)
+
+    def PlaceCards(self, rows, sides, slots, xs, ys) -> None:
+        cards = self.decks[rows, sides, slots]
+
+        # Same rule as Card.Place, not enough elixir means nothing happens
+        ok = self.elixir[rows, sides] >= CARD_COST[cards]
+        rows, sides, slots, xs, ys, cards = rows[ok], sides[ok], slots[ok], xs[ok], ys[ok], cards[ok]
+
+        if len(rows) == 0:
+            return
+
+        self.elixir[rows, sides] -= CARD_COST[cards]
+
+        spell = CARD_IS_SPELL[cards]
+
+        if spell.any():
+            self.state.SpawnSpells(rows[spell], sides[spell], xs[spell], ys[spell])
+
+        counts = CARD_COUNT[cards[~spell]]
+        total = counts.sum()
+
+        if total:
+            spread = self.rng.integers(-SPAWN_SPREAD, SPAWN_SPREAD, size=(2, total))
+
+            self.state.SpawnUnits(np.repeat(rows[~spell], counts), np.repeat(CARD_UNIT_TYPE[cards[~spell]], counts), np.repeat(sides[~spell], counts),
+                                  np.repeat(xs[~spell], counts) + spread[0], np.repeat(ys[~spell], counts) + spread[1])
+
+        # Same cycling as Player.PlaceCard: the next card takes the played slot and the played card goes to the back
+        deck = self.decks[rows, sides]
+        cycled = deck.copy()
+
+        index = np.arange(len(rows))
+        cycled[index, slots] = deck[:, HAND_SIZE]
+        cycled[:, HAND_SIZE:-1] = deck[:, HAND_SIZE + 1:]
+        cycled[:, -1] = deck[index, slots]
+
+        self.decks[rows, sides] = cycled
+
+    def ApplyActions(self, actions, side: int) -> None:
+        actions = np.asarray(actions, np.int64)
+        rows = np.flatnonzero(actions > 0)
+
+        if len(rows) == 0:
+            return
+
+        slot, cell = np.divmod(actions[rows] - 1, NUM_CELLS)
+        xs, ys = CellPosition(cell, side == 0)
+
+        self.PlaceCards(rows, np.full(len(rows), side), slot, xs, ys)
+
+    # Vectorised agent.Agent: save up for a random hand card then drop it somewhere random
+    def RandomOpponent(self) -> None:
+        choice = self.opponentChoice
+        ready = self.elixir[:, 1] >= CARD_COST[self.decks[self.allRows, 1, choice]]
+
+        rows = np.flatnonzero(ready)
+
+        if len(rows) == 0:
+            return
+
+        xs = self.rng.integers(50, 400, size=len(rows)).astype(np.float64)
+        ys = self.rng.integers(80, 291, size=len(rows)).astype(np.float64)
+
+        self.PlaceCards(rows, np.ones(len(rows), np.int64), choice[rows], xs, ys)
+
+        choice[rows] = self.rng.integers(0, HAND_SIZE - 1, size=len(rows))
+
+    def TowerHealth(self):
+        return np.maximum(self.state.entities.health[:, :NUM_TOWERS], 0)
+
+    # Returns observations, rewards, done flags and info for every game. Finished games are
+    # reset in place, their last observation is in info["finalObservation"].
+    def step(self, actions, opponentActions=None):
+        dt = self.dt
+
+        reward = np.zeros(self.games)
+        done = np.zeros(self.games, np.bool_)
+        winner = np.full(self.games, -1, np.int64)
+
+        blueTowers = [i for i, layout in enumerate(TOWER_LAYOUT) if layout[2] == 0]
+        redTowers = [i for i, layout in enumerate(TOWER_LAYOUT) if layout[2] == 1]
+
+        for frame in range(self.frameSkip):
+            self.lifetime += dt
+
+            # Games that ran out of time end before simulating, same as Game.Tick
+            timedOut = ~done & (self.lifetime > GAME_LENGTH)
+            done |= timedOut
+
+            self.elixir = np.minimum(MAX_ELIXIR, self.elixir + ELIXIR_PER_SECOND * dt)
+
+            if frame == 0:
+                self.ApplyActions(np.where(done, 0, actions), 0)
+
+                if opponentActions is None:
+                    self.RandomOpponent()
+                else:
+                    self.ApplyActions(np.where(done, 0, opponentActions), 1)
+
+            before = self.TowerHealth()
+
+            kingDied = self.state.Step(dt)
+
+            lost = (before - self.TowerHealth()) / self.state.entities.maxHealth[:, :NUM_TOWERS]
+            reward += np.where(done, 0, lost[:, redTowers].sum(axis=1) - lost[:, blueTowers].sum(axis=1))
+
+            # Blue's king going down means red won
+            newlyDone = ~done & kingDied.any(axis=1)
+            winner[newlyDone] = np.where(kingDied[newlyDone, 1], 0, 1)
+            done |= newlyDone
+
+        reward += np.where(winner == 0, WIN_REWARD, 0) - np.where(winner == 1, WIN_REWARD, 0)
+
+        observation = self.Observe(0)
+        info = {"winner": winner}
+
+        finished = np.flatnonzero(done)
+
+        if len(finished):
+            info["finalObservation"] = observation[finished].copy()
+
+            self.ResetGames(finished)
+
+            observation[finished] = self.Observe(0)[finished]
+
+        return observation, reward, done, info
+
+    # Batched version of the observation layout in clash.spaces, from one player's point of view
+    def Observe(self, playerIndex: int, out=None):
+        e = self.state.entities
+        n = self.state.used
+
+        if out is None:
+            out = np.zeros((self.games, OBSERVATION_SIZE), np.float32)
+        else:
+            out[...] = 0
+
+        out[:, OBS_ELIXIR] = self.elixir[:, playerIndex] / MAX_ELIXIR
+        out[:, OBS_TIME] = self.lifetime / GAME_LENGTH
+        out[:, OBS_CARDS:OBS_TOWERS] = (self.decks[:, playerIndex, :HAND_SIZE + 1] + 1) / len(DECK)
+        out[:, OBS_TOWERS:OBS_TROOPS] = (self.TowerHealth() / e.maxHealth[:, :NUM_TOWERS])[:, TowerOrder(playerIndex)]
+
+        troop = e.alive[:, NUM_TOWERS:n] & ~e.tower[:, NUM_TOWERS:n]
+        rank = np.cumsum(troop, axis=1) - 1
+
+        rows, slots = np.nonzero(troop & (rank < MAX_OBSERVED_TROOPS))
+        ranks = rank[rows, slots]
+        slots = slots + NUM_TOWERS
+
+        y = e.y[rows, slots]
+        if playerIndex == 1:
+            y = ARENA_HEIGHT - y
+
+        features = out[:, OBS_TROOPS:].reshape(self.games, MAX_OBSERVED_TROOPS, TROOP_FEATURES)
+
+        features[rows, ranks, 0] = np.where(e.side[rows, slots] == playerIndex, 1, -1)
+        features[rows, ranks, 1] = e.unitType[rows, slots] / MAX_TROOP_TYPE
+        features[rows, ranks, 2] = e.x[rows, slots] / ARENA_WIDTH
+        features[rows, ranks, 3] = y / ARENA_HEIGHT
+        features[rows, ranks, 4] = e.health[rows, slots] / e.maxHealth[rows, slots]
+
+        return out
@@ -0,0 +1,192 @@
+from typing import Callable, List, Optional
+from clash.game import *
+import json
+import time
+import tracemalloc
+
+# A scenario is flagged when it gets this much slower (or uses this much more memory) than the baseline
+REGRESSION_THRESHOLD = 0.1
+
+# Plays the first of its cards that's in hand as soon as it can afford it. If none of them come
+# up it dumps whatever's first in hand once elixir is full so the deck keeps cycling.
+class ScriptedPlayer(Player):
+    cards = ()
+
+    def Tick(self, dt):
+        for index in range(HAND_SIZE):
+            card = self.deck[index]
+
+            if isinstance(card, self.cards) and self.elixir >= card.cost:
+                self.Play(index)
+                return
+
+        if self.elixir >= MAX_ELIXIR:
+            self.Play(0)
+
+    def Play(self, index):
+        x, y = self.rng.randrange(50, 400), self.rng.randrange(80, 291)
+
+        if self.isFocused:
+            y = 600 - y
+
+        self.PlaceCard(x, y, index)
+
+class SkarmyPlayer(ScriptedPlayer):
+    cards = (SkarmyCard, SkeletonCard)
+
+class PushPlayer(ScriptedPlayer):
+    cards = (GiantCard, BabyDragonCard)
+
+class FireballPlayer(ScriptedPlayer):
+    cards = (FireballCard,)
+
+    # Fireballs go where the enemy troops are, or at the princess towers if there aren't any
+    def Play(self, index):
+        if not isinstance(self.deck[index], FireballCard):
+            super().Play(index)
+            return
+
+        enemies = [t for t in self.game.troops if t.owner != self and not t.dead]
+
+        if enemies:
+            target = enemies[self.rng.randrange(len(enemies))]
+        else:
+            target = self.rng.choice([t for t in self.game.towers if t.owner != self and not t.isKing])
+
+        self.PlaceCard(target.x, target.y, index)
+
+STRESS_TROOPS = 200
+
+# Half the troops on each side of the river, already walking at each other
+def _StressSetup(game) -> None:
+    rng = game.rng.random
+    troopClasses = [Skeleton, Knight, MiniPekka, Giant, BabyDragon]
+
+    for i in range(STRESS_TROOPS):
+        owner = game.players[i % 2]
+        y = rng.uniform(320, 500) if owner.isFocused else rng.uniform(100, 280)
+
+        game.SpawnTroop(rng.uniform(60, 390), y, troopClasses[i % len(troopClasses)], owner)
+
+class Scenario():
+    def __init__(self, name: str, blueClass, redClass, games: int = 3, seed: int = 0,
+                 maxTicks: Optional[int] = None, setup: Optional[Callable] = None):
+        self.name = name
+        self.blueClass = blueClass
+        self.redClass = redClass
+
+        # Game i is seeded with seed + i so every run simulates exactly the same thing
+        self.games = games
+        self.seed = seed
+
+        # Cut games off after this many ticks, None to play them out
+        self.maxTicks = maxTicks
+
+        # Called with each new game before it starts
+        self.setup = setup
+
+    def MakeGame(self, index: int):
+        game = Game(self.blueClass, self.redClass, verbose=False, seed=self.seed + index)
+
+        if self.setup:
+            self.setup(game)
+
+        return game
+
+    def Play(self, game, dt: float = FIXED_DT) -> None:
+        while game.running and (self.maxTicks is None or game.ticks < self.maxTicks):
+            game.Tick(dt)
+
+# A minute of game time, long enough for the board to fill up without the suite taking ages
+SCENARIO_TICKS = 3600
+
+SCENARIOS = [
+    Scenario("skarmy_mirror", SkarmyPlayer, SkarmyPlayer, games=2, maxTicks=SCENARIO_TICKS),
+    Scenario("giant_baby_dragon", PushPlayer, PushPlayer, games=2, maxTicks=SCENARIO_TICKS),
+    Scenario("fireball_heavy", FireballPlayer, FireballPlayer, games=2, maxTicks=SCENARIO_TICKS),
+    Scenario("stress_200", Player, Player, games=1, maxTicks=300, setup=_StressSetup),
+]
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
+
+class ScenarioResult():
+    def __init__(self, name, games, ticks, wallTime, peakMemory):
+        self.name = name
+        self.games = games
+        self.ticks = ticks
+        self.wallTime = wallTime
+
+        # Bytes for one game, from a separate tracemalloc run since tracing slows everything down
+        self.peakMemory = peakMemory
+
+        self.ticksPerSecond = ticks / wallTime if wallTime > 0 else 0
+        self.gamesPerSecond = games / wallTime if wallTime > 0 else 0
+
+    def ToDict(self) -> dict:
+        return dict(self.__dict__)
+
+    def Summary(self) -> str:
+        return (f"{self.name:<20} {int(self.ticksPerSecond):>8} ticks/s {round(self.gamesPerSecond, 3):>8} games/s "
+                f"{round(self.peakMemory / 2**20, 2):>8} MiB peak")
+
+# Best of repeats so one noisy run doesn't look like a regression
+def RunScenario(scenario: Scenario, repeats: int = 3, dt: float = FIXED_DT) -> ScenarioResult:
+    bestTime = float("inf")
+    ticks = 0
+
+    for r in range(repeats):
+        games = [scenario.MakeGame(i) for i in range(scenario.games)]
+
+        startTime = time.perf_counter()
+
+        for game in games:
+            scenario.Play(game, dt)
+
+        bestTime = min(bestTime, time.perf_counter() - startTime)
+        ticks = sum(game.ticks for game in games)
+
+    tracemalloc.start()
+
+    scenario.Play(scenario.MakeGame(0), dt)
+
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return ScenarioResult(scenario.name, scenario.games, ticks, bestTime, peakMemory)
+
+def RunSuite(names: Optional[List[str]] = None, repeats: int = 3) -> List[ScenarioResult]:
+    scenarios = [SCENARIOS_BY_NAME[name] for name in names] if names else SCENARIOS
+
+    return [RunScenario(scenario, repeats) for scenario in scenarios]
+
+def SaveBaseline(results: List[ScenarioResult], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump({r.name: r.ToDict() for r in results}, f, indent=1)
+
+def LoadBaseline(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+# Returns a message for every scenario that got slower or hungrier than the baseline by more than threshold
+def FindRegressions(results: List[ScenarioResult], baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    regressions = []
+
+    for result in results:
+        old = baseline.get(result.name)
+
+        if old is None: continue
+
+        if result.ticks != old["ticks"]:
+            regressions.append(f"{result.name}: simulated {result.ticks} ticks, baseline has {old['ticks']} "
+                               f"(the scenario's games play out differently now, timings aren't comparable)")
+
+        if result.ticksPerSecond < old["ticksPerSecond"] * (1 - threshold):
+            change = 1 - result.ticksPerSecond / old["ticksPerSecond"]
+            regressions.append(f"{result.name}: {int(result.ticksPerSecond)} ticks/s is {round(change * 100, 1)}% "
+                               f"slower than the baseline's {int(old['ticksPerSecond'])}")
+
+        if result.peakMemory > old["peakMemory"] * (1 + threshold):
+            change = result.peakMemory / old["peakMemory"] - 1
+            regressions.append(f"{result.name}: peak memory up {round(change * 100, 1)}% on the baseline")
+
+    return regressions
@@ -1,20 +1,31 @@
 from clash.troops import *
-import random
+from clash.stats import CARDS, StatProperty
+
+# Multi-unit cards scatter their troops up to this far from where they were placed
+SPAWN_SPREAD = 10
 
 class Card():
     cardName = ""
 
-    def __init__(self, troop, cost):
+    # Troops spawned per placement
+    count = 1
+
+    cost = StatProperty("cost")
+
+    def __init__(self, troop):
         self.troop = troop
-        self.cost = cost
+        self.stats = CARDS[self.cardName]
 
         self.owner = None
 
     def SetOwner(self, owner):
         self.owner = owner
 
+    def CanPlace(self) -> bool:
+        return self.owner is not None and self.owner.elixir >= self.cost
+
     def Place(self, x, y) -> bool:
-        if self.owner and self.owner.elixir >= self.cost:
+        if self.CanPlace():
             self.owner.game.SpawnTroop(x, y, self.troop, self.owner)
 
             return True
@@ -25,42 +36,48 @@ class KnightCard(Card):
     cardName = "KNIGHT"
 
     def __init__(self):
-        super().__init__(Knight, 3)
+        super().__init__(Knight)
 
 class GiantCard(Card):
     cardName = "GIANT"
 
     def __init__(self):
-        super().__init__(Giant, 5)
+        super().__init__(Giant)
 
 class MiniPekkaCard(Card):
     cardName = "MINI_PEKKA"
 
     def __init__(self):
-        super().__init__(MiniPekka, 4)
+        super().__init__(MiniPekka)
 
 class BabyDragonCard(Card):
     cardName = "BABY_DRAGON"
 
     def __init__(self):
-        super().__init__(BabyDragon, 4)
+        super().__init__(BabyDragon)
 
 class FireballCard(Card):
     cardName = "FIREBALL"
 
     def __init__(self):
-        super().__init__(Fireball, 4)
+        super().__init__(Fireball)
 
 
 class SkeletonCard(Card):
     cardName = "SKELETON"
+    count = 3
 
     def __init__(self):
-        super().__init__(Skeleton, 1)
+        super().__init__(Skeleton)
 
     def Place(self, x, y) -> bool:
-        for i in range(3):
-            result = super().Place(x + random.randrange(-10, 10), y + random.randrange(-10, 10))
+        # Bail before drawing offsets so a card that can't be afforded doesn't move the game's rng
+        if not self.CanPlace(): return False
+
+        rng = self.owner.game.rng
+
+        for i in range(self.count):
+            result = super().Place(x + rng.Offset(), y + rng.Offset())
 
             if not result: return False
 
@@ -68,13 +85,19 @@ class SkeletonCard(Card):
 
 class SkarmyCard(Card):
     cardName = "SKARMY"
+    count = 15
 
     def __init__(self):
-        super().__init__(Skeleton, 3)
+        super().__init__(Skeleton)
 
     def Place(self, x, y) -> bool:
-        for i in range(15):
-            result = super().Place(x + random.randrange(-10, 10), y + random.randrange(-10, 10))
+        # Bail before drawing offsets so a card that can't be afforded doesn't move the game's rng
+        if not self.CanPlace(): return False
+
+        rng = self.owner.game.rng
+
+        for i in range(self.count):
+            result = super().Place(x + rng.Offset(), y + rng.Offset())
 
             if not result: return False
 
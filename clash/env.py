@@ -0,0 +1,230 @@
+from multiprocessing import Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+from clash.game import *
+from clash.spaces import *
+import numpy as np
+
+# Stands in for the learning side, the env places its cards directly
+class EnvPlayer(Player):
+    def Tick(self, dt):
+        pass
+
+# reset(seed) / step(action) wrapper around Game. The learner always plays blue.
+class ClashEnv():
+    def __init__(self, opponentClass=Player, frameSkip: int = 15, dt: float = FIXED_DT, gameClass=Game):
+        self.opponentClass = opponentClass
+        self.gameClass = gameClass
+
+        # Ticks simulated per step
+        self.frameSkip = frameSkip
+        self.dt = dt
+
+        self.game = None
+        self.player = None
+
+        self.observation = np.zeros(OBSERVATION_SIZE, np.float32)
+
+    def TowerHealth(self):
+        return [max(0, tower.health) / tower.maxHealth for tower in self.game.towers]
+
+    def reset(self, seed: Optional[int] = None, out=None):
+        self.game = self.gameClass(EnvPlayer, self.opponentClass, verbose=False, seed=seed)
+        self.player = self.game.players[0]
+
+        return self.Observe(out)
+
+    # out lets callers have the observation written straight into their own buffer
+    def Observe(self, out=None):
+        if out is None:
+            out = self.observation
+
+        EncodeObservation(self.game, self.player, out)
+
+        return out
+
+    def step(self, action: int, out=None):
+        game = self.game
+
+        decoded = DecodeAction(action)
+        placed = False
+
+        if decoded is not None:
+            slot, cell = decoded
+            x, y = CellPosition(cell, self.player.isFocused)
+
+            placed = self.player.PlaceCard(x, y, slot)
+
+        before = self.TowerHealth()
+
+        for i in range(self.frameSkip):
+            if not game.running: break
+
+            game.Tick(self.dt)
+
+        lost = [b - a for b, a in zip(before, self.TowerHealth())]
+        order = TowerOrder(0)
+
+        reward = sum(lost[i] for i in order[3:]) - sum(lost[i] for i in order[:3])
+
+        if game.winner == self.player:
+            reward += WIN_REWARD
+        elif game.winner is not None:
+            reward -= WIN_REWARD
+
+        info = {"placed": placed, "lifetime": game.lifetime}
+
+        return self.Observe(out), reward, not game.running, info
+
+# Shared memory layout for SubprocVectorEnv, everything is (numEnvs, ...)
+def _BufferLayout(numEnvs):
+    layout = []
+    offset = 0
+
+    for name, dtype, shape in [
+        ("observations", np.float32, (numEnvs, OBSERVATION_SIZE)),
+        ("rewards", np.float64, (numEnvs,)),
+        ("dones", np.bool_, (numEnvs,)),
+        ("actions", np.int64, (numEnvs,)),
+    ]:
+        # Keep every array 8 byte aligned
+        offset = (offset + 7) // 8 * 8
+        layout.append((name, dtype, shape, offset))
+
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+    return layout, offset
+
+def _BufferViews(buffer, numEnvs):
+    layout, size = _BufferLayout(numEnvs)
+
+    return {name: np.ndarray(shape, dtype, buffer=buffer, offset=offset) for name, dtype, shape, offset in layout}
+
+def _Worker(conn, memoryName, numEnvs, indices, envArgs):
+    memory = SharedMemory(name=memoryName)
+    views = _BufferViews(memory.buf, numEnvs)
+
+    envs = {i: ClashEnv(**envArgs) for i in indices}
+
+    # Seed for each env's next game, None until reset is given a seed
+    seeds = {i: None for i in indices}
+
+    observations, rewards, dones, actions = views["observations"], views["rewards"], views["dones"], views["actions"]
+
+    try:
+        while True:
+            command, arg = conn.recv()
+
+            if command == "reset":
+                for i in indices:
+                    seeds[i] = None if arg is None else arg + i
+                    envs[i].reset(seeds[i], observations[i])
+
+                conn.send(None)
+
+            elif command == "step":
+                infos = {}
+
+                for i in indices:
+                    observation, reward, done, info = envs[i].step(int(actions[i]), observations[i])
+
+                    rewards[i] = reward
+                    dones[i] = done
+
+                    # Start the next game straight away, the learner gets the final frame in info
+                    if done:
+                        info["finalObservation"] = observation.copy()
+                        if seeds[i] is not None:
+                            seeds[i] += numEnvs
+
+                        envs[i].reset(seeds[i], observations[i])
+
+                    infos[i] = info
+
+                conn.send(infos)
+
+            elif command == "close":
+                break
+    finally:
+        del observations, rewards, dones, actions, views
+        memory.close()
+        conn.close()
+
+# Runs numEnvs ClashEnvs across worker processes. Observations, rewards and done flags live in
+# shared memory, so the arrays returned by reset and step are views that the next call overwrites.
+class SubprocVectorEnv():
+    def __init__(self, numEnvs: int, workers: Optional[int] = None, **envArgs):
+        self.numEnvs = numEnvs
+
+        workers = min(numEnvs, workers or numEnvs)
+
+        layout, size = _BufferLayout(numEnvs)
+
+        self.memory = SharedMemory(create=True, size=size)
+        self.views = _BufferViews(self.memory.buf, numEnvs)
+
+        self.observations = self.views["observations"]
+        self.rewards = self.views["rewards"]
+        self.dones = self.views["dones"]
+        self.actions = self.views["actions"]
+
+        self.connections = []
+        self.processes = []
+
+        for w in range(workers):
+            indices = list(range(w, numEnvs, workers))
+            parent, child = Pipe()
+
+            process = Process(target=_Worker, args=(child, self.memory.name, numEnvs, indices, envArgs), daemon=True)
+            process.start()
+            child.close()
+
+            self.connections.append(parent)
+            self.processes.append(process)
+
+        self.closed = False
+
+    # Env i is seeded with seed + i, and its later games with seed + i + numEnvs, seed + i + 2 * numEnvs...
+    def reset(self, seed: Optional[int] = None):
+        for conn in self.connections:
+            conn.send(("reset", seed))
+
+        for conn in self.connections:
+            conn.recv()
+
+        return self.observations
+
+    def step(self, actions):
+        self.actions[:] = actions
+
+        for conn in self.connections:
+            conn.send(("step", None))
+
+        infos = [None] * self.numEnvs
+
+        for conn in self.connections:
+            for i, info in conn.recv().items():
+                infos[i] = info
+
+        return self.observations, self.rewards, self.dones, infos
+
+    def close(self) -> None:
+        if self.closed: return
+
+        for conn in self.connections:
+            conn.send(("close", None))
+
+        for process in self.processes:
+            process.join()
+
+        self.closed = True
+
+        del self.observations, self.rewards, self.dones, self.actions, self.views
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,93 +1,251 @@
 from typing import List
-from pygame.math import Vector2
+from clash.vector2 import Vector2
 from typing import Optional
 from clash.troops import *
 from clash.cards import *
+from clash.spatial import SpatialGrid
+from clash.navigation import GetFlowFields
+from clash.occupancy import OccupancyGrid
+from clash.rng import GameRandom, CopyRandom
+from clash.profiler import NO_PROFILER
+from clash.stats import TOWERS, StatProperty
+from clash.scheduler import DecisionScheduler, WakeCondition, TickPlayer
 import random
+import math
+from operator import attrgetter
 
 ELIXIR_PER_SECOND = 1/2.8
 PRINCESS_FIRE_RATE = 1/0.8
 
+STARTING_ELIXIR = 5
+MAX_ELIXIR = 10
+GAME_LENGTH = 180
+
+# Seconds per tick for anything that isn't tied to a frame rate (headless runs, replays, training)
+FIXED_DT = 1/60
+
+TOWER_PROJECTILE_SPEED = 300
+PROJECTILE_HIT_RADIUS = 16
+AOE_TRIGGER_DISTANCE = 5
+
+# Projectiles are dropped once they leave ARENA_BOUNDS, or once they've been flying this many seconds
+# longer than it should have taken to reach what they were aimed at, whether or not they hit anything
+PROJECTILE_LIFETIME_MARGIN = 1
+ARENA_BOUNDS = (-50, -50, 500, 700)
+
+# Projectiles each game has ready to use before it needs to allocate any
+PROJECTILE_POOL_SIZE = 16
+
+# Every player gets the same cards, shuffled. The first HAND_SIZE are playable
+DECK = [
+    FireballCard,
+    BabyDragonCard,
+    KnightCard,
+    GiantCard,
+    SkeletonCard,
+    SkarmyCard,
+    MiniPekkaCard
+]
+HAND_SIZE = 4
+
+# (x, y, player index, isKing), player 0 is blue
+TOWER_LAYOUT = [
+    (120, 425, 0, False),
+    (330, 425, 0, False),
+    (225, 480, 0, True),
+
+    (120, 130, 1, False),
+    (330, 130, 1, False),
+    (225, 70, 1, True)
+]
+
+# (left, top, width, height) of the square troops can't walk through around each tower
+TOWER_BOXES = [(x - 20, y - 20, 40, 40) for x, y, player, isKing in TOWER_LAYOUT]
+
 class Projectile():
-    def __init__(self, x, y, owner, dir: Vector2, speed: float, damage: float, target: Optional[Troop] = None):
+    __slots__ = ("game", "x", "y", "owner", "dirX", "dirY", "speed", "target", "damage", "age", "maxAge", "dead")
+
+    def __init__(self, game, x, y, owner, dir: Vector2, speed: float, damage: float, target: Optional[Troop] = None):
+        self.Reset(game, x, y, owner, dir, speed, damage, target)
+
+    # Pooled projectiles are set up again with this instead of being made from scratch
+    def Reset(self, game, x, y, owner, dir: Vector2, speed: float, damage: float, target: Optional[Troop] = None) -> None:
+        self.game = game
+
         self.x = x
         self.y = y
 
         self.owner = owner
 
-        self.dir = dir
+        # Unit direction of travel, two floats so homing doesn't make a new Vector2 every tick
+        self.dirX = dir.x
+        self.dirY = dir.y
         self.speed = speed
 
         self.target = target
         self.damage = damage
 
+        self.age = 0
+        self.maxAge = PROJECTILE_LIFETIME_MARGIN
+
+        if target:
+            self.maxAge += math.hypot(target.x - x, target.y - y) / speed
+
+        self.dead = False
+
+    # Moves along dir, returns False if the projectile flew off the arena or ran out of time
+    def Fly(self, dt) -> bool:
+        self.x += self.dirX * dt * self.speed
+        self.y += self.dirY * dt * self.speed
+
+        self.age += dt
+
+        minX, minY, maxX, maxY = ARENA_BOUNDS
+
+        if self.age > self.maxAge or not (minX <= self.x <= maxX and minY <= self.y <= maxY):
+            self.game.KillProjectile(self)
+            return False
+
+        return True
+
     def Tick(self, dt):
-        self.x += self.dir.x * dt * self.speed
-        self.y += self.dir.y * dt * self.speed
+        if self.dead: return
+
+        target = self.target
+
+        if target:
+            # Nothing left to hit
+            if target.dead:
+                self.game.KillProjectile(self)
+                return
 
-        if self.target:
+            # Home in on where the target is now
+            dx = target.x - self.x
+            dy = target.y - self.y
+
+            length = math.sqrt(dx * dx + dy * dy)
+
+            if length > 0:
+                self.dirX = dx / length
+                self.dirY = dy / length
+
+        if not self.Fly(dt): return
+
+        if target:
             # Check if dist to target is close
-            dx = self.target.x - self.x
-            dy = self.target.y - self.y
+            dx = target.x - self.x
+            dy = target.y - self.y
 
-            radius = 16
+            radius = PROJECTILE_HIT_RADIUS
 
             if dx * dx + dy * dy <= (radius*radius):
-                self.target.TakeDamage(None, self.damage)
+                target.TakeDamage(None, self.damage)
                 
-                self.owner.game.KillProjectile(self)
+                self.game.KillProjectile(self)
 
 class AOEProjectile(Projectile):
-    def __init__(self, x, y, owner, dir, speed, damage, targetPos: Vector2, radius: float):
-        super().__init__(x, y, owner, dir, speed, damage)
+    __slots__ = ("targetX", "targetY", "radius")
+
+    def __init__(self, game, x, y, owner, dir, speed, damage, targetPos: Vector2, radius: float):
+        self.Reset(game, x, y, owner, dir, speed, damage, targetPos, radius)
 
-        self.targetPos = targetPos
+    def Reset(self, game, x, y, owner, dir, speed, damage, targetPos: Vector2, radius: float) -> None:
+        super().Reset(game, x, y, owner, dir, speed, damage)
+
+        self.targetX = targetPos.x
+        self.targetY = targetPos.y
         self.radius = radius
 
+        # A Fireball from the king tower can be in the air for several seconds
+        self.maxAge = PROJECTILE_LIFETIME_MARGIN + math.hypot(self.targetX - x, self.targetY - y) / speed
+
     def Tick(self, dt):
-        self.x += self.dir.x * dt * self.speed
-        self.y += self.dir.y * dt * self.speed
+        if self.dead: return
+
+        if not self.Fly(dt): return
 
-        if Vector2.distance_to(self.targetPos, (self.x, self.y)) <= 5:
+        dx = self.targetX - self.x
+        dy = self.targetY - self.y
+
+        if dx * dx + dy * dy <= AOE_TRIGGER_DISTANCE * AOE_TRIGGER_DISTANCE:
             # Damage all troops in the radius
-            for troop in list(self.owner.owner.game.troops):
+            game = self.game
+            x, y = self.targetX, self.targetY
+            radiusSquared = self.radius * self.radius
+
+            for troop in game.grid.Query(x, y, self.radius):
                 if troop.owner == self.owner: continue
+                if troop.dead: continue
 
-                if Vector2.distance_to(self.targetPos, (troop.x, troop.y)) <= self.radius:
+                if (troop.x - x)**2 + (troop.y - y)**2 <= radiusSquared:
                     troop.TakeDamage(None, self.damage)
 
-            for tower in list(self.owner.owner.game.towers):
-                if tower.owner == self.owner: continue
+            for tower in game.towers:
+                if tower.owner == self.owner or tower.dead: continue
 
-                if Vector2.distance_to(self.targetPos, (tower.x, tower.y)) <= self.radius:
+                if (tower.x - x)**2 + (tower.y - y)**2 <= radiusSquared:
                     tower.TakeDamage(None, self.damage)
 
-            self.owner.owner.game.KillProjectile(self)
+            game.KillProjectile(self)
+
+# Projectiles finished with at the end of a tick wait here to be reused by the next ones spawned,
+# so a long game stops allocating them once it has as many as are ever in the air at once
+class ProjectilePool():
+    def __init__(self, size: int = 0):
+        self.free = {
+            Projectile: [object.__new__(Projectile) for _ in range(size)],
+            AOEProjectile: [object.__new__(AOEProjectile) for _ in range(size)]
+        }
+
+    def Acquire(self, projectileClass, *args) -> Projectile:
+        free = self.free[projectileClass]
+
+        if free:
+            projectile = free.pop()
+            projectile.Reset(*args)
+
+            return projectile
+
+        return projectileClass(*args)
+
+    def Release(self, projectile) -> None:
+        # Don't keep whatever it was aimed at alive
+        projectile.owner = projectile.target = None
+
+        self.free[type(projectile)].append(projectile)
 
 class Tower():
-    def __init__(self, x, y, owner, game, active=True, isKing=False):
+    __slots__ = ("x", "y", "index", "fireTimer", "owner", "game", "stats", "target", "active", "health", "dead",
+                 "retarget", "nextRetarget")
+
+    damage = StatProperty("damage")
+    maxHealth = StatProperty("maxHealth")
+    range = StatProperty("range")
+    isKing = StatProperty("isKing")
+
+    def __init__(self, x, y, owner, game, active=True, isKing=False, index=0):
         self.x = x
         self.y = y
 
+        # Position in TOWER_LAYOUT, for its flow field and occupancy footprint
+        self.index = index
+
         self.fireTimer = 0
 
         self.owner = owner
         self.game = game
 
-        self.damage = 99
+        self.stats = TOWERS["King" if isKing else "Princess"]
 
         self.target: Optional[Troop] = None
         self.active = active
 
-        self.maxHealth = 2786
-        self.range = 130
-        self.health = self.maxHealth
+        self.health = self.stats.maxHealth
         self.dead = False
 
-        self.isKing = isKing
-
-        if isKing:
-            self.range = 200
+        # Same as Troop, towers only look for a new target when told to or every retargetPeriod
+        self.retarget = True
+        self.nextRetarget = 0
 
     def Tick(self, dt: float) -> None:
         if not self.active: return
@@ -101,16 +259,24 @@ class Tower():
 
             dx, dy = self.target.x - self.x, self.target.y - self.y
 
-            self.game.SpawnProjectile(self.x, self.y, self, Vector2(dx, dy).normalize(), 300, self.damage, self.target)
+            self.game.SpawnProjectile(self.x, self.y, self, Vector2(dx, dy).normalize(), TOWER_PROJECTILE_SPEED, self.stats.damage, self.target)
 
     def PickTarget(self) -> None:
         if self.target != None:
             if self.target.dead:
                 self.target = None
+                self.retarget = True
 
             return
 
-        for troop in self.game.troops:
+        if not self.retarget and self.game.lifetime < self.nextRetarget: return
+
+        self.retarget = False
+        self.nextRetarget = self.game.lifetime + self.game.retargetPeriod
+
+        range = self.stats.range
+
+        for troop in self.game.grid.Query(self.x, self.y, range):
             if troop.owner == self.owner: continue
             if troop.dead: continue
 
@@ -118,19 +284,39 @@ class Tower():
             dy = troop.y - self.y
 
             # Lock on
-            if dx*dx + dy*dy <= (self.range*self.range):
+            if dx*dx + dy*dy <= (range*range):
                 self.target = troop
 
+        if self.target != None:
+            self.target.targeters.append(self)
+
     def Activate(self):
         self.active = True
-        print("activated")
+        self.retarget = True
+
+        if self.game.verbose:
+            print("activated")
 
     def Die(self):
+        if self.dead: return
+
+        self.game.occupancy.ClearTower(self.index)
+        self.game.flowFields = self.game.flowFields.Fallen(self.index)
+
+        if self.target != None and not self.target.dead:
+            self.target.targeters.remove(self)
+
+        # Every enemy troop's closest building may have changed, not just the ones hitting this
+        for troop in self.game.troops:
+            if troop.owner != self.owner:
+                troop.retarget = True
+
         self.dead = True
         self.active = False
 
-        if self.isKing:
-            self.game.GameOver()
+        if self.stats.isKing:
+            winner = self.game.players[1] if self.owner == self.game.players[0] else self.game.players[0]
+            self.game.GameOver(winner)
 
         # Activate king tower
         for tower in self.owner.game.towers:
@@ -151,19 +337,14 @@ class Player():
         self.isFocused = isFocused
         self.game: "Game" = game
         
-        self.elixir: float = 5
-
-        self.deck: List[Card] = [
-            FireballCard(),
-            BabyDragonCard(),
-            KnightCard(),
-            GiantCard(),
-            SkeletonCard(),
-            SkarmyCard(),
-            MiniPekkaCard()    
-        ]
+        self.elixir: float = STARTING_ELIXIR
+
+        self.deck: List[Card] = [cardClass() for cardClass in DECK]
         
-        random.shuffle(self.deck)
+        self.game.rng.Shuffle(self.deck)
+
+        # Agents make their own random choices with this so they don't disturb the game's stream
+        self.rng = self.game.rng.Derive()
 
         for card in self.deck:
             card.SetOwner(self)
@@ -172,7 +353,11 @@ class Player():
 
         self.owner = self
 
-    def PlaceCard(self, x, y, index):
+        # None to be ticked every game tick, or a DecisionScheduler to only be ticked when it says so
+        self.scheduler: Optional[DecisionScheduler] = None
+
+    # Returns True if the card was played
+    def PlaceCard(self, x, y, index) -> bool:
         cardToPlace: Card = self.deck[index]
 
         if cardToPlace.Place(x, y):
@@ -187,21 +372,115 @@ class Player():
             self.deck.insert(i, card5)
             self.deck.append(cardToPlace)
 
+            self.game.Notify("CardPlaced", self, x, y, index)
+
+            return True
+
+        return False
+
+    # Game time this player next needs to be ticked at, only asked while the board is empty.
+    # By default that's once the cheapest card in hand is affordable, agents that act on anything
+    # else (the clock, their own timers) should return when they want to wake up instead.
+    def WakeTime(self) -> float:
+        cheapest = min(card.cost for card in self.deck[:HAND_SIZE])
+
+        if self.elixir >= cheapest:
+            return self.game.lifetime
+
+        return self.game.lifetime + (cheapest - self.elixir) / ELIXIR_PER_SECOND
+
     def Tick(self, dt):
         pass
 
-class Game:
-    def __init__(self, blueClass, redClass):
+# What Game and VectorizedGame share: the players, observers and ending the game
+class BaseGame():
+    # Players that didn't set up their own scheduler decide every decisionInterval seconds
+    def CreatePlayers(self, blueClass, redClass, decisionInterval=None):
         blue, red = blueClass(self, True), redClass(self, False)
 
         self.players: List[Player] = [blue, red]
+        self.observers = []
+
+        if decisionInterval is not None:
+            for player in self.players:
+                if player.scheduler is None:
+                    player.scheduler = DecisionScheduler(decisionInterval)
+
+        return blue, red
+
+    def GetFocusedPlayer(self) -> Player:
+        if self.players[0].isFocused:
+            return self.players[0]
+        else:
+            return self.players[1]
+
+    def AddObserver(self, observer) -> None:
+        self.observers.append(observer)
+
+    def RemoveObserver(self, observer) -> None:
+        self.observers.remove(observer)
+
+    # Calls observer.<event>(game, *args) on every observer that has it
+    def Notify(self, event, *args) -> None:
+        for observer in self.observers:
+            callback = getattr(observer, event, None)
+
+            if callback:
+                callback(self, *args)
+
+    def GameOver(self, winner: Optional[Player] = None):
+        if self.verbose:
+            print("Game over!")
+
+        self.winner = winner
+        self.running = False
+
+        self.Notify("GameOver")
+
+class Game(BaseGame):
+    def __init__(self, blueClass, redClass, verbose=True, seed=None, fastForward=False, decisionInterval=None):
+        self.verbose = verbose
+
+        # Skip straight past stretches with nothing on the board, see FastForward
+        self.fastForward = fastForward
+
+        # Everything random in the game comes from here, so a seed replays the whole game
+        self.rng = GameRandom(seed, SPAWN_SPREAD)
+
+        blue, red = self.CreatePlayers(blueClass, redClass, decisionInterval)
+
         self.troops: List[Troop] = []
         self.projectiles: List[Projectile] = []
+        self.projectilePool = ProjectilePool(PROJECTILE_POOL_SIZE)
         self.towers: List[Tower] = []
-        self.observers = []
+
+        # Rebuilt every tick, used for all the "what's near me" queries
+        self.grid = SpatialGrid()
+
+        # Headings to the towers and bridges, shared by every game in the process. Swapped for the
+        # fields with its box opened up each time a tower falls
+        self.flowFields = GetFlowFields(RIVER_Y, BRIDGES, OBSTACLES, TOWER_BOXES)
+
+        # What troops bump into, towers are cleared from it as they fall
+        self.occupancy = OccupancyGrid(OBSTACLES, TOWER_BOXES)
+
+        # Set to a TickProfiler to time each phase of the tick
+        self.profiler = None
+
+        # Longest a troop or tower goes without searching for a better target, 0 searches every tick
+        self.retargetPeriod = RETARGET_PERIOD
+
+        # Killed this tick but still in the lists until Compact()
+        self.deadTroops = 0
+        self.deadProjectiles = 0
 
         self.running = True
         self.lifetime = 0
+        self.ticks = 0
+        self.playerPhase = False
+
+        # None means the clock ran out
+        self.winner: Optional[Player] = None
 
         self.elixirMultiplier = 1
 
@@ -216,37 +495,91 @@ class Game:
 
         # Create towers
         self.towers: List[Tower] = [
-            Tower(120, 425, blue, self),
-            Tower(330, 425, blue, self),
-            Tower(225, 480, blue, self, active=False, isKing=True),
-
-            Tower(120, 130, red, self),
-            Tower(330, 130, red, self),
-            Tower(225, 70, red, self, active=False, isKing=True)
+            Tower(x, y, self.players[i], self, active=not isKing, isKing=isKing, index=index)
+            for index, (x, y, i, isKing) in enumerate(TOWER_LAYOUT)
         ]
 
         blue.kingTower = self.towers[2]
         red.kingTower = self.towers[5]
 
-    def GetFocusedPlayer(self) -> Player:
-        if self.players[0].isFocused: 
-            return self.players[0]
-        else: 
-            return self.players[1]
+    # Copies the whole game for lookahead search. Every entity reachable from the game is
+    # shallow copied once and its references to other entities are pointed at the copies,
+    # so owner/game back-references never recurse like deepcopy. Anything else an agent holds
+    # (models, caches) is shared. Observers are not carried over.
+    def Fork(self) -> "Game":
+        clones = {}
+        pending = []
 
-    def AddObserver(self, observer) -> None:
-        self.observers.append(observer)
+        def Clone(obj):
+            clone = clones.get(id(obj))
 
-    def RemoveObserver(self, observer) -> None:
-        self.observers.remove(observer)
+            if clone is None:
+                clone = object.__new__(type(obj))
+
+                if hasattr(obj, "__dict__"):
+                    clone.__dict__ = obj.__dict__.copy()
+
+                clones[id(obj)] = clone
+                pending.append((obj, clone))
+
+            return clone
+
+        def Remap(value):
+            if isinstance(value, FORKED_TYPES):
+                return Clone(value)
+
+            if isinstance(value, RANDOM_TYPES):
+                copy = clones.get(id(value))
+
+                if copy is None:
+                    copy = clones[id(value)] = CopyRandom(value)
+
+                return copy
+
+            if type(value) is list:
+                return [Clone(v) if isinstance(v, FORKED_TYPES) else v for v in value]
+
+            return value
+
+        game = Clone(self)
+
+        while pending:
+            obj, clone = pending.pop()
+
+            if hasattr(clone, "__dict__"):
+                state = clone.__dict__
+
+                for key, value in state.items():
+                    if type(value) in PLAIN_TYPES: continue
+
+                    state[key] = Remap(value)
+
+            # Slots are copied straight from the original, remapping as they go
+            for name, value in SlotValues(obj):
+                setattr(clone, name, value if type(value) in PLAIN_TYPES else Remap(value))
+
+        game.observers = []
+
+        # Lookahead shouldn't show up in the real game's profile
+        game.profiler = None
+
+        game.grid = SpatialGrid(self.grid.cellSize)
+        game.grid.Rebuild(game.troops)
+
+        game.occupancy = self.occupancy.Copy()
+
+        # Forks are short lived, they allocate the few projectiles they need
+        game.projectilePool = ProjectilePool()
+
+        return game
 
     def SpawnProjectile(self, x, y, owner, dir, speed, damage, target=None) -> None:
-        p = Projectile(x, y, owner, dir, speed, damage, target)
+        p = self.projectilePool.Acquire(Projectile, self, x, y, owner, dir, speed, damage, target)
 
         self.projectiles.append(p)
 
     def SpawnAOEProjectile(self, x, y, owner, dir, speed, damage, targetPos, radius) -> None:
-        p = AOEProjectile(x, y, owner, dir, speed, damage, targetPos, radius)
+        p = self.projectilePool.Acquire(AOEProjectile, self, x, y, owner, dir, speed, damage, targetPos, radius)
 
         self.projectiles.append(p)
 
@@ -257,44 +590,165 @@ class Game:
         if troopClass in [Fireball]: return
 
         self.troops.append(troop)
+        self.grid.Insert(troop)
+
+        # Enemies that could want the new troop search again instead of waiting for their next retarget
+        for other in self.grid.Query(x, y, AGGRO_RADIUS):
+            if other.owner != owner and (other.x - x)**2 + (other.y - y)**2 <= AGGRO_RADIUS*AGGRO_RADIUS:
+                other.retarget = True
+
+        for tower in self.towers:
+            if tower.owner != owner and (tower.x - x)**2 + (tower.y - y)**2 <= tower.stats.range*tower.stats.range:
+                tower.retarget = True
     
-    # TODO: This is ass
+    # Kills only flag the entity, so nothing gets skipped by a list shrinking under the tick's loops.
+    # Compact() drops everything dead in one pass at the end of the tick.
     def KillTroop(self, troop):
-        if troop in self.troops:
-            self.troops.remove(troop)
+        if troop.dead: return
+
+        troop.dead = True
+        self.deadTroops += 1
 
     def KillProjectile(self, projectile):
-        self.projectiles.remove(projectile)
+        if projectile.dead: return
 
-    def GameOver(self):
-        print("Game over!")
-        self.running = False
+        projectile.dead = True
+        self.deadProjectiles += 1
+
+    # Stable, so the lists stay in the order things were spawned in
+    def Compact(self) -> None:
+        if self.deadTroops:
+            self.troops[:] = [t for t in self.troops if not t.dead]
+            self.deadTroops = 0
+
+        if self.deadProjectiles:
+            for p in self.projectiles:
+                if p.dead:
+                    self.projectilePool.Release(p)
+
+            self.projectiles[:] = [p for p in self.projectiles if not p.dead]
+            self.deadProjectiles = 0
+
+    def GameOver(self, winner: Optional[Player] = None):
+        if self.profiler:
+            self.profiler.games += 1
+
+        super().GameOver(winner)
+
+    # Ticks that can be skipped right now: nothing on the board and neither player wants to act.
+    # Stops a couple of ticks short of the wake up so rounding can't make anyone miss it.
+    def IdleTicks(self, dt: float) -> int:
+        if self.troops or self.projectiles:
+            return 0
+
+        wake = min(GAME_LENGTH, *(player.WakeTime() for player in self.players))
+
+        return max(0, int((wake - self.lifetime) / dt) - 2)
+
+    # Advances n ticks in one go. Only valid while idle, when all that changes is the clock,
+    # elixir and tower reload timers, so those are worked out directly.
+    def SkipTicks(self, n: int, dt: float) -> None:
+        elapsed = n * dt
 
+        self.lifetime += elapsed
+        self.ticks += n
+
+        for p in self.players:
+            p.elixir = min(MAX_ELIXIR, p.elixir + ELIXIR_PER_SECOND * elapsed)
+
+        for tower in self.towers:
+            if tower.active:
+                tower.fireTimer = min(1, tower.fireTimer + PRINCESS_FIRE_RATE * elapsed)
+
+    # Note a fast forwarded game ends up a float rounding away from the same game ticked normally
     def Tick(self, dt: float) -> None:
         if not self.running:
             return
-        
+
+        if self.fastForward:
+            idle = self.IdleTicks(dt)
+
+            if idle:
+                self.SkipTicks(idle, dt)
+
+        # Told as each phase of the tick finishes, NO_PROFILER ignores it all
+        profiler = self.profiler or NO_PROFILER
+        profiler.StartTick()
+
         self.lifetime += dt
+        self.ticks += 1
 
-        if self.lifetime > 180:
+        if self.lifetime > GAME_LENGTH:
             self.GameOver()
+            profiler.EndTick()
             return
         
         for p in self.players:
-            p.elixir = min(10, p.elixir + ELIXIR_PER_SECOND * dt)
+            p.elixir = min(MAX_ELIXIR, p.elixir + ELIXIR_PER_SECOND * dt)
 
-        # Sort for z-ordering
-        # Remove this if its slow
-        self.troops.sort(key=lambda x: x.y)
+        profiler.Phase("elixir")
+
+        self.grid.Rebuild(self.troops)
+
+        profiler.Phase("grid")
+
+        # Cards played during this phase happen "inside" the tick, anything else between ticks
+        self.playerPhase = True
 
         for player in self.players:
-            player.Tick(dt)
+            TickPlayer(player, dt)
+
+        self.playerPhase = False
+
+        profiler.Phase("Player.Tick", len(self.players))
 
-        for troop in self.troops:
-            troop.Tick(dt)
+        profiler.TickTroops(self.troops, dt)
 
         for p in self.projectiles:
             p.Tick(dt)
 
+        profiler.Phase("Projectile.Tick", len(self.projectiles))
+
         for tower in self.towers:
-            tower.Tick(dt)
\ No newline at end of file
+            tower.Tick(dt)
+
+        profiler.Phase("Tower.Tick", len(self.towers))
+
+        self.Compact()
+
+        profiler.Phase("compact")
+        profiler.EndTick()
+
+# Everything Game.Fork copies, anything else is shared between the original and the fork
+FORKED_TYPES = (Game, Player, Card, Troop, Tower, Projectile, DecisionScheduler, WakeCondition)
+
+# Random state is copied too so forks replay the same way
+RANDOM_TYPES = (GameRandom, random.Random)
+
+# Attribute values Game.Fork can skip without looking at
+PLAIN_TYPES = {int, float, bool, str, type(None), type}
+
+_SLOT_GETTERS = {}
+
+# (name, value) for every __slots__ attribute of obj's class and its bases that has been set
+def SlotValues(obj):
+    cls = type(obj)
+    getter = _SLOT_GETTERS.get(cls)
+
+    if getter is None:
+        names = tuple(name for base in cls.__mro__ for name in base.__dict__.get("__slots__", ())
+                      if name not in ("__dict__", "__weakref__"))
+
+        getter = _SLOT_GETTERS[cls] = (names, attrgetter(*names) if names else None)
+
+    names, get = getter
+
+    if not names:
+        return ()
+
+    try:
+        values = get(obj)
+    except AttributeError:
+        return [(name, getattr(obj, name)) for name in names if hasattr(obj, name)]
+
+    return zip(names, values) if len(names) > 1 else [(names[0], values)]
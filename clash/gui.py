@@ -1,15 +1,77 @@
 import os
+import math
 import pygame
 from pygame import gfxdraw
 
 SHOW_FPS = True
 
-pygame.init()
+# Sprites are only ever rotated to multiples of this many degrees, so each one is rotated at most
+# 360 / ANGLE_STEP times over a whole session instead of once per troop per frame
+ANGLE_STEP = 5
 
+# Sprites are drawn at 4x the window's resolution and shrunk by this once, when they're loaded or first
+# rotated, so they keep smooth edges without supersampling the whole screen every frame
+NATIVE_SCALE = 0.25
+
+# The card tray and elixir bar along the bottom of the window
+TRAY_RECT = pygame.Rect(0, 575, 450, 145)
+
+# Troops barely move between frames so the draw order is almost sorted already, which is insertion
+# sort's best case (close to one pass) and cheaper than sorting from scratch
+def _InsertionSortByY(items) -> None:
+    for i in range(1, len(items)):
+        item = items[i]
+        y = item.y
+        j = i - 1
+
+        while j >= 0 and items[j].y > y:
+            items[j + 1] = items[j]
+            j -= 1
+
+        items[j + 1] = item
+
+# Scaled and rotated copies of sprites, keyed by (name, angle bucket, scale) and made the first time
+# they're asked for. Warm() makes every angle up front so the first few seconds of a game don't stutter.
+class SpriteCache():
+    def __init__(self):
+        self.images = {}
+        self.sprites = {}
+
+    def Add(self, name, image) -> None:
+        self.images[name] = image
+
+    # Rotated before it's scaled down, so rotation steps get smoothed out like they used to
+    def Get(self, name, angle=0, scale=1):
+        bucket = round(angle / ANGLE_STEP) % (360 // ANGLE_STEP)
+        key = (name, bucket, scale)
+
+        sprite = self.sprites.get(key)
+
+        if sprite is None:
+            sprite = self.images[name]
+
+            if bucket:
+                sprite = pygame.transform.rotate(sprite, bucket * ANGLE_STEP)
+
+            if scale != 1:
+                sprite = pygame.transform.smoothscale_by(sprite, scale)
+
+            self.sprites[key] = sprite
+
+        return sprite
+
+    def Warm(self, name, scale=1) -> None:
+        for bucket in range(360 // ANGLE_STEP):
+            self.Get(name, bucket * ANGLE_STEP, scale)
+
+# Draws straight into the window. The arena and card tray are kept in self.background, and each frame
+# only the areas sprites covered last frame are restored from it and sent to the display.
 class GUI:
-    def __init__(self) -> None:   
+    def __init__(self, prewarm: bool = False) -> None:
         self.SCREEN_WIDTH, self.SCREEN_HEIGHT = 450, 720
 
+        # Only started once there's something to draw, headless games never touch SDL
+        pygame.init()
         pygame.display.init()
 
         # Get the directory where main.py is located (project root)
@@ -17,23 +79,32 @@ class GUI:
         self.IMG_PATH = os.path.join(root_dir, "images/")
 
         self.win = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.NOFRAME, pygame.SRCALPHA)
-        self.surfaceHD = pygame.Surface((self.SCREEN_WIDTH*4, self.SCREEN_HEIGHT*4), pygame.SRCALPHA)
-        self.shadowLayer = pygame.Surface((self.SCREEN_WIDTH*4, self.SCREEN_HEIGHT*4), pygame.SRCALPHA)
 
         self.bgImage = pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "bg.jpg"), 0.5)
+
+        # Kept at 4x, the sprite cache shrinks it to each troop's size
         self.shadowImage = pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "shadow.png"), (0.4, 0.28))
         self.shadowImage.set_alpha(128)
 
-        self.healthbarBlue = pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "healthbar-blue.png"), 1.6)
-        self.healthbarRed = pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "healthbar-red.png"), (1.75, 1.61))
+        self.healthbarBlue = self.LoadImage("healthbar-blue.png", 1.6)
+        self.healthbarRed = self.LoadImage("healthbar-red.png", (1.75, 1.61))
+
+        self.destroyedTower = self.LoadImage("destroyed.png", 2.3)
 
-        self.destroyedTower = pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "destroyed.png"), 2.3)
+        self.elixirBubble = self.LoadImage("elixir.png", 0.9)
+        self.elixirBubbleLarge = self.LoadImage("elixir.png", 0.9 * 1.2)
+        self.elixirBubbleSmall = self.LoadImage("elixir.png", 0.9 * 0.6)
 
-        self.elixirBubble = pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "elixir.png"), 0.9)
+        # These were always drawn at window size
         self.elixirBar = pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "elixir-bar.png"), 1.1)
         self.elixirBarBlank = pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "elixir-bar-blank.png"), 1.1)
         self.brown = pygame.image.load(self.IMG_PATH + 'brown.png')
 
+        # The partly filled bubble of elixir
+        self.elixirBarPart = self.elixirBar.copy()
+        self.elixirBarPart.set_alpha(128)
+
+        # Kept at 4x, the sprite cache rotates and shrinks them
         self.imagesByTroop = {
             "GIANT": pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "giant-walk.png"), 0.6),
             "SKELETON": pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "skeleton.png"), 1.5),
@@ -43,60 +114,150 @@ class GUI:
         }
 
         self.cardImages = {
-            "KNIGHT": pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "knight-card.webp"), 0.6),
-            "GIANT": pygame.image.load(self.IMG_PATH + "giant-card.png"),
-            "SKARMY": pygame.image.load(self.IMG_PATH + "skarmy-card.png"),
-            "SKELETON": pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + "skeletons-card.png"), 0.6),
-            "MINI_PEKKA": pygame.image.load(self.IMG_PATH + "mini-pekka-card.png"),
-            "BABY_DRAGON": pygame.image.load(self.IMG_PATH + "baby-dragon-card.png"),
-            "FIREBALL": pygame.image.load(self.IMG_PATH + "fireball-card.png"),
+            "KNIGHT": self.LoadImage("knight-card.webp", 0.6),
+            "GIANT": self.LoadImage("giant-card.png"),
+            "SKARMY": self.LoadImage("skarmy-card.png"),
+            "SKELETON": self.LoadImage("skeletons-card.png", 0.6),
+            "MINI_PEKKA": self.LoadImage("mini-pekka-card.png"),
+            "BABY_DRAGON": self.LoadImage("baby-dragon-card.png"),
+            "FIREBALL": self.LoadImage("fireball-card.png"),
         }
 
+        # Next up card
+        self.smallCardImages = {name: pygame.transform.smoothscale_by(image, 0.6) for name, image in self.cardImages.items()}
+
+        self.sprites = SpriteCache()
+
+        for name, image in self.imagesByTroop.items():
+            self.sprites.Add(name, image)
+
+        self.sprites.Add("shadow", self.shadowImage)
+
+        # Projectiles look the same every time, only the arrow gets rotated
+        aoeImage = pygame.Surface((64, 64), pygame.SRCALPHA)
+        pygame.draw.circle(aoeImage, (255, 0, 0, 128), (32, 32), 32)
+        self.sprites.Add("aoe", aoeImage)
+
+        arrowImage = pygame.Surface((48, 16), pygame.SRCALPHA)
+        pygame.draw.rect(arrowImage, (30, 30, 32), (0, 0, 48, 16), border_radius=2)
+        self.sprites.Add("arrow", arrowImage)
+
+        if prewarm:
+            for name in list(self.imagesByTroop) + ["arrow"]:
+                self.sprites.Warm(name, NATIVE_SCALE)
+
         self.fpsHistory = []
 
+        # The game keeps troops in spawn order, this is the same troops back to front for drawing
+        self.drawOrder = []
+
+        # Text is rendered at 4x and shrunk like the sprites
         self.font = pygame.font.Font(self.IMG_PATH + 'font.otf', 30)
         self.largeFont = pygame.font.Font(self.IMG_PATH + 'font.otf', 60)
+        self.texts = {}
+
+        # Everything that never moves, then the same with the current hand drawn over it
+        self.arena = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
+        self.arena.blit(self.bgImage, (-415, 0))
+
+        self.arena.blit(self.brown, (126, 707))
+        self.arena.blit(self.brown, (131, 684))
+
+        for i in range(10):
+            self.arena.blit(self.elixirBarBlank, (123 + i * 29, 690))
+
+        self.background = self.arena.copy()
+
+        # Cards the tray was last drawn with
+        self.hand = None
+
+        # Areas drawn over last frame, and this frame so far
+        self.dirty = []
+        self.drawn = []
+
+        self.fullRedraw = True
+
+    # scale is relative to the 4x size the layout was designed at
+    def LoadImage(self, name, scale=1):
+        if isinstance(scale, tuple):
+            scale = (scale[0] * NATIVE_SCALE, scale[1] * NATIVE_SCALE)
+        else:
+            scale *= NATIVE_SCALE
+
+        return pygame.transform.smoothscale_by(pygame.image.load(self.IMG_PATH + name), scale)
+
+    def Text(self, text, font, scale=NATIVE_SCALE, colour=(230, 230, 230)):
+        key = (text, font, scale, colour)
+
+        surface = self.texts.get(key)
+
+        if surface is None:
+            surface = font.render(text, True, colour)
+
+            if scale != 1:
+                surface = pygame.transform.smoothscale_by(surface, scale)
+
+            self.texts[key] = surface
+
+        return surface
+
+    # Blits to the window and remembers the area so it's cleaned up next frame
+    def Draw(self, image, position, area=None) -> None:
+        self.drawn.append(self.win.blit(image, position, area))
 
     # Return False if UI has terminated this frame
     def Tick(self, dt, game) -> bool:
-        self.win.blit(self.bgImage, (-415, 0))
+        player = game.GetFocusedPlayer()
+
+        self.drawn = []
 
-        # Fill with transparent
-        self.surfaceHD.fill((0, 0, 0, 0))
-        self.shadowLayer.fill((0, 0, 0, 0))
+        hand = tuple(card.cardName for card in player.deck[:5])
+
+        if hand != self.hand:
+            self.DrawTray(player)
+            self.hand = hand
+
+        if self.fullRedraw:
+            self.win.blit(self.background, (0, 0))
+        else:
+            # Put back whatever was under last frame's sprites
+            for rect in self.dirty:
+                self.win.blit(self.background, rect, rect)
+
+        troops = self.UpdateDrawOrder(game)
+
+        # Troop sprites and where they go, shadows are all drawn first so they're under everything
+        placed = [self.PlaceTroop(t) for t in troops]
+
+        for troop, sprite, drawX, drawY, shadow, shadowPosition in placed:
+            self.Draw(shadow, shadowPosition)
 
         for tower in game.towers:
             if tower.dead:
-                self.surfaceHD.blit(self.destroyedTower, (tower.x * 4 - 130, tower.y * 4 - 60))
+                self.Draw(self.destroyedTower, (tower.x - 32.5, tower.y - 15))
                 continue
 
             if not tower.active: continue
 
-            drawY = tower.y * 4 + 90
+            drawY = tower.y + 22.5
 
             if not tower.owner.isFocused:
-                drawY -= 170
+                drawY -= 42.5
 
-            self.DrawHealthBar(tower.x * 4 - 120, drawY, tower)
+            self.DrawHealthBar(tower.x - 30, drawY, tower)
 
-        for t in game.troops:
-            self.DrawTroop(t)
+        for troop, sprite, drawX, drawY, shadow, shadowPosition in placed:
+            self.Draw(sprite, (drawX, drawY))
+            self.DrawHealthBar(drawX, drawY, troop)
 
         for p in game.projectiles:
             self.DrawProjectile(p)
 
-        self.DrawCards(game.GetFocusedPlayer())
-        self.DrawElixirBar(game.GetFocusedPlayer())
-
-        scaledHD = pygame.transform.smoothscale_by(self.surfaceHD, 0.25)
-        scaledShadow = pygame.transform.smoothscale_by(self.shadowLayer, 0.25)
+        self.DrawElixirBar(player)
 
-        self.win.blit(scaledShadow, (0, 0))
-        self.win.blit(scaledHD, (0, 0))
-        
         if SHOW_FPS:
             fps = str(int(1 / dt)) if dt > 0 else "N/A"
-            
+
             self.fpsHistory.append(1 / dt if dt > 0 else 0)
             if len(self.fpsHistory) > 10:
                 self.fpsHistory.pop(0)
@@ -104,15 +265,36 @@ class GUI:
             avgFPS = sum(self.fpsHistory) / len(self.fpsHistory)
             fps = str(int(avgFPS))
 
-            fpsSurface = self.font.render(fps, True, (255, 255, 255))
-            self.win.blit(fpsSurface, (10, 10))
-        
+            self.Draw(self.Text(fps, self.font, 1, (255, 255, 255)), (10, 10))
+
         self.ProcessEvents()
 
-        pygame.display.flip()
+        if self.fullRedraw:
+            pygame.display.flip()
+            self.fullRedraw = False
+        else:
+            pygame.display.update(self.dirty + self.drawn)
+
+        self.dirty = self.drawn
 
         return True
-    
+
+    # Drops troops that are gone, adds new ones on the end and re-sorts by y
+    def UpdateDrawOrder(self, game):
+        troops = game.troops
+        current = set(troops)
+
+        drawOrder = [t for t in self.drawOrder if t in current]
+        known = set(drawOrder)
+
+        drawOrder.extend(t for t in troops if t not in known)
+
+        _InsertionSortByY(drawOrder)
+
+        self.drawOrder = drawOrder
+
+        return drawOrder
+
     # Handle closing the window
     def ProcessEvents(self):
         for e in pygame.event.get():
@@ -124,24 +306,24 @@ class GUI:
                 if e.key == pygame.K_ESCAPE:
                     quit()
                     return False
-                
+
             if e.type == pygame.MOUSEBUTTONDOWN:
                 x, y = pygame.mouse.get_pos()
                 print(f"Mouse clicked at: ({x}, {y})")
-    
+
     def DrawHealthBar(self, drawX, drawY, owner) -> None:
-        maxWidth = 100
+        maxWidth = 25
 
         barW = int(maxWidth * (owner.health / owner.maxHealth))
-        barX = drawX + 80
+        barX = drawX + 20
         barY = drawY
 
         colour = (52, 146, 235) # Blue
         drawImg = self.healthbarBlue
 
         if not owner.owner.isFocused:
-            barY -= 8
-            barX += 4
+            barY -= 2
+            barX += 1
 
             colour = (217, 33, 51) # Red
             drawImg = self.healthbarRed
@@ -150,115 +332,97 @@ class GUI:
         if owner.health == owner.maxHealth:
             # Don't even draw level on towers
             if not hasattr(owner, "active"):
-                self.surfaceHD.blit(drawImg, (drawX + 20, drawY - 30), (0, 0, 60, 100))
+                self.Draw(drawImg, (drawX + 5, drawY - 7.5), (0, 0, 15, 25))
         else:
-            self.surfaceHD.blit(drawImg, (drawX + 20, drawY - 30))
+            self.Draw(drawImg, (drawX + 5, drawY - 7.5))
 
-            pygame.draw.rect(self.surfaceHD, (50, 50, 60), (barX, barY, maxWidth, 16), border_radius=3)
-            pygame.draw.rect(self.surfaceHD, colour, (barX, barY, barW, 16), border_radius=3)
+            self.drawn.append(pygame.draw.rect(self.win, (50, 50, 60), (barX, barY, maxWidth, 4), border_radius=1))
+            pygame.draw.rect(self.win, colour, (barX, barY, barW, 4), border_radius=1)
 
     def DrawElixirBar(self, player):
-        self.win.blit(self.brown, (126, 707))
-        self.win.blit(self.brown, (131, 684))
-
-        for i in range(10):
-            self.win.blit(self.elixirBarBlank, (123 + i * 29, 690))
-
         for i in range(int(player.elixir)):
-            self.win.blit(self.elixirBar, (125 + i * 29, 692))
+            self.Draw(self.elixirBar, (125 + i * 29, 692))
 
         amountLeft = player.elixir % 1
 
         if amountLeft > 0:
-            scaled = pygame.transform.smoothscale_by(self.elixirBar, 4)
-
-            full_w, full_h = scaled.get_size()
-            part_w = full_w * amountLeft
+            full_w, full_h = self.elixirBar.get_size()
+            part_w = int(full_w * amountLeft)
             if part_w > 0:
-                part = scaled.subsurface((0, 0, part_w, full_h)).copy()
-                part.set_alpha(128)
-                self.surfaceHD.blit(part, (125 * 4 + int(player.elixir) * 29 * 4, 692 * 4))
+                self.Draw(self.elixirBarPart, (125 + int(player.elixir) * 29, 692), (0, 0, part_w, full_h))
 
-        bigger = pygame.transform.smoothscale_by(self.elixirBubble, 1.2)
-        self.surfaceHD.blit(bigger, (95*4, 676*4))
+        self.Draw(self.elixirBubbleLarge, (95, 676))
+        self.Draw(self.Text(str(int(player.elixir)), self.largeFont), (115, 695))
 
-        elixirText = self.largeFont.render(str(int(player.elixir)), True, (230, 230, 230))
-        self.surfaceHD.blit(elixirText, (115*4, 695*4))
+    # Only redrawn when the hand changes, into the background so it's never cleaned up
+    def DrawTray(self, player):
+        self.background.blit(self.arena, TRAY_RECT, TRAY_RECT)
 
-    def DrawCards(self, player):
         for i in range(4):
             card = player.deck[i]
 
             if card.cardName not in self.cardImages: continue
 
-            yOffset = 2392
-
-            if self.cardImages[card.cardName].get_height() == 420:
-                yOffset -= 60
+            yOffset = 598
 
-            self.surfaceHD.blit(self.cardImages[card.cardName], (456 + 304*i, yOffset)) #760
-            self.surfaceHD.blit(self.elixirBubble, (524 + 304*i, 2613)) # 838
+            # 420 tall at 4x
+            if self.cardImages[card.cardName].get_height() == 105:
+                yOffset -= 15
 
-            elixirText = self.largeFont.render(str(card.cost), True, (230, 230, 230))
-            self.surfaceHD.blit(elixirText, (590 + 304*i, 2663))
+            self.background.blit(self.cardImages[card.cardName], (114 + 76*i, yOffset))
+            self.background.blit(self.elixirBubble, (131 + 76*i, 653.25))
+            self.background.blit(self.Text(str(card.cost), self.largeFont), (147.5 + 76*i, 665.75))
 
         # Draw the next up card
         card = player.deck[4]
 
-        smallImg = pygame.transform.smoothscale_by(self.cardImages[card.cardName], 0.6)
-        smallElixir = pygame.transform.smoothscale_by(self.elixirBubble, 0.6)
+        yOffset = 667
+        if self.cardImages[card.cardName].get_height() == 105:
+            yOffset -= 9
 
-        yOffset = 2668
-        if self.cardImages[card.cardName].get_height() == 420:
-            yOffset -= 36
+        self.background.blit(self.smallCardImages[card.cardName], (37, yOffset))
+        self.background.blit(self.elixirBubbleSmall, (47.5, 700))
+        self.background.blit(self.Text(str(card.cost), self.font), (57.5, 707.5))
 
-        self.surfaceHD.blit(smallImg, (148, yOffset)) #760
-        self.surfaceHD.blit(smallElixir, (190, 2800)) # 838
+        self.win.blit(self.background, TRAY_RECT, TRAY_RECT)
+        self.drawn.append(TRAY_RECT)
 
-        elixirText = self.font.render(str(card.cost), True, (230, 230, 230))
-        self.surfaceHD.blit(elixirText, (230, 2830))
+    # (troop, sprite, x, y, shadow, shadow position)
+    def PlaceTroop(self, troop):
+        name = troop.troopType.name
+        direction = troop.direction
 
-    def DrawTroop(self, troop) -> None:
-        troopImg = self.imagesByTroop[troop.troopType.name]
-        scaledShadow = pygame.transform.smoothscale_by(self.shadowImage, troopImg.get_width()/270)
+        # Shadows are sized to the unrotated sprite
+        shadow = self.sprites.Get("shadow", 0, self.imagesByTroop[name].get_width()/270 * NATIVE_SCALE)
 
-        troopImg = pygame.transform.rotate(troopImg, troop.direction - 90)
+        sprite = self.sprites.Get(name, direction - 90, NATIVE_SCALE)
 
-        width = troopImg.get_width()
-        height = troopImg.get_height()
+        width = sprite.get_width()
+        height = sprite.get_height()
 
-        drawX = troop.x * 4 - width // 2
-        drawY = troop.y * 4 - height // 2
+        drawX = troop.x - width / 2
+        drawY = troop.y - height / 2
 
         shadowY = drawY + height/2
 
         if troop.air:
-            shadowY += 40
+            shadowY += 10
 
-        if troop.direction > 180:
+        if direction > 180:
             shadowY -= height
 
             if troop.air:
-                shadowY -= 40
+                shadowY -= 10
 
-        self.shadowLayer.blit(scaledShadow, (drawX + width/8, shadowY))
-        self.surfaceHD.blit(troopImg, (drawX, drawY))
-
-        self.DrawHealthBar(drawX, drawY, troop)
+        return troop, sprite, drawX, drawY, shadow, (drawX + width/8, shadowY)
 
     def DrawProjectile(self, projectile) -> None:
         if hasattr(projectile, "radius"):
-            projectileImage = pygame.Surface((64, 64), pygame.SRCALPHA)
-            pygame.draw.circle(projectileImage, (255, 0, 0, 128), (32, 32), 32)
-
-            self.surfaceHD.blit(projectileImage, (projectile.x*4 - 32, projectile.y*4 - 32))
+            self.Draw(self.sprites.Get("aoe", 0, NATIVE_SCALE), (projectile.x - 8, projectile.y - 8))
 
         else:
-            projectileSurface = pygame.Surface((48, 16), pygame.SRCALPHA)
-            pygame.draw.rect(projectileSurface, (30, 30, 32), (0, 0, 48, 16), border_radius=2)
-            
-            rotatedSurface = pygame.transform.rotate(projectileSurface, -projectile.dir.as_polar()[1])
-            
-            rect = rotatedSurface.get_rect(center=(projectile.x*4, projectile.y*4))
-            
-            self.surfaceHD.blit(rotatedSurface, rect)
\ No newline at end of file
+            rotatedSurface = self.sprites.Get("arrow", -math.degrees(math.atan2(projectile.dirY, projectile.dirX)), NATIVE_SCALE)
+
+            rect = rotatedSurface.get_rect(center=(projectile.x, projectile.y))
+
+            self.Draw(rotatedSurface, rect)
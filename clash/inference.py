@@ -0,0 +1,183 @@
+from typing import Callable, List, Optional
+from clash.game import *
+from clash.spaces import *
+from clash.scheduler import WakeCondition
+import numpy as np
+import threading
+import time
+
+# Observations waiting for an action, one per BrokeredPlayer decision
+class PendingAction():
+    def __init__(self, broker, submitted):
+        self.broker = broker
+        self.submitted = submitted
+
+        self.done = False
+        self.action = None
+
+    # Blocks until the broker has run the batch this is in. Waiters flush the batch themselves once
+    # it's waited maxLatency, so no background thread is needed.
+    def Wait(self) -> int:
+        broker = self.broker
+
+        with broker.lock:
+            while not self.done:
+                if broker.Poll(locked=True):
+                    continue
+
+                broker.lock.wait(broker.maxLatency)
+
+        return self.action
+
+# Gathers observations from players in any number of games into one array and runs the policy on
+# all of them at once. A batch runs as soon as it holds maxBatch observations, when Flush is called,
+# or once the oldest has waited maxLatency seconds (checked by Poll and by blocked waiters). Submit
+# never looks at the clock, so lockstep runs batch the same way every time.
+#
+# policy takes a (n, OBSERVATION_SIZE) float32 array and returns n actions (see clash.spaces).
+class InferenceBroker():
+    def __init__(self, policy: Callable, maxBatch: int = 64, maxLatency: float = 0.005):
+        self.policy = policy
+        self.maxBatch = maxBatch
+        self.maxLatency = maxLatency
+
+        # Observations are written straight into this so a batch is never copied together
+        self.observations = np.zeros((maxBatch, OBSERVATION_SIZE), np.float32)
+        self.pending: List[PendingAction] = []
+
+        self.lock = threading.Condition()
+
+        self.batches = 0
+        self.requests = 0
+
+    # Returns a PendingAction, observe(row) should fill in the row of the batch it's given
+    def Submit(self, observe: Callable) -> PendingAction:
+        with self.lock:
+            request = PendingAction(self, time.perf_counter())
+
+            observe(self.observations[len(self.pending)])
+
+            self.pending.append(request)
+            self.requests += 1
+
+            if len(self.pending) >= self.maxBatch:
+                self.Flush(locked=True)
+
+            return request
+
+    # Runs the batch if its oldest request has waited long enough, returns whether it did
+    def Poll(self, locked: bool = False) -> bool:
+        if not locked:
+            with self.lock:
+                return self.Poll(locked=True)
+
+        if self.pending and time.perf_counter() - self.pending[0].submitted >= self.maxLatency:
+            self.Flush(locked=True)
+            return True
+
+        return False
+
+    def Flush(self, locked: bool = False) -> None:
+        if not locked:
+            with self.lock:
+                return self.Flush(locked=True)
+
+        if not self.pending: return
+
+        count = len(self.pending)
+        actions = np.asarray(self.policy(self.observations[:count]))
+
+        for request, action in zip(self.pending, actions):
+            request.action = int(action)
+            request.done = True
+
+        self.pending = []
+        self.batches += 1
+
+        self.lock.notify_all()
+
+    def Summary(self) -> str:
+        average = self.requests / self.batches if self.batches else 0
+
+        return f"{self.requests} observations in {self.batches} batches ({round(average, 1)} per batch)"
+
+# Wakes a scheduled BrokeredPlayer as soon as its action is back
+class ActionReady(WakeCondition):
+    def __init__(self, request: PendingAction):
+        self.request = request
+
+    def Check(self, player) -> bool:
+        return self.request.done
+
+# A player whose moves come from a shared InferenceBroker. Without blocking it submits an
+# observation, keeps playing the game and acts on the answer the next time it's ticked after the
+# batch ran, which is what RunLockstep relies on. With blocking it waits for its answer inside Tick,
+# for games running on their own threads. Set broker (and blocking) on a subclass.
+class BrokeredPlayer(Player):
+    broker: Optional[InferenceBroker] = None
+    blocking = False
+
+    def __init__(self, game, isFocused):
+        super().__init__(game, isFocused)
+
+        self.request: Optional[PendingAction] = None
+
+    def Observe(self, out) -> None:
+        EncodeObservation(self.game, self, out)
+
+    def Act(self, action: int) -> None:
+        decoded = DecodeAction(action)
+
+        if decoded is None: return
+
+        slot, cell = decoded
+        x, y = CellPosition(cell, self.isFocused)
+
+        self.PlaceCard(x, y, slot)
+
+    def Tick(self, dt):
+        if self.request is not None:
+            if not self.request.done: return
+
+            self.Act(self.request.action)
+            self.request = None
+
+            # A scheduled player was only woken to play its answer, it observes again at its next decision
+            if self.scheduler is not None: return
+
+        self.request = self.broker.Submit(self.Observe)
+
+        if self.blocking:
+            self.Act(self.request.Wait())
+            self.request = None
+
+        elif self.scheduler is not None:
+            self.scheduler.Wake(ActionReady(self.request))
+
+# Ticks every game one step at a time until they're all over, running the broker's batch after each
+# step so every BrokeredPlayer's answer is ready for the next one. Games can mix in normal agents.
+def RunLockstep(games, broker: InferenceBroker, dt: float = FIXED_DT) -> None:
+    running = list(games)
+
+    while running:
+        for game in running:
+            game.Tick(dt)
+
+        broker.Flush()
+
+        running = [game for game in running if game.running]
+
+# Runs each game on its own thread with blocking players, the batch fills up from whichever games
+# are waiting. Game ticks still hold the GIL, so this mostly pays off when the policy releases it.
+def RunThreaded(games, dt: float = FIXED_DT) -> None:
+    def Run(game):
+        while game.running:
+            game.Tick(dt)
+
+    threads = [threading.Thread(target=Run, args=(game,), daemon=True) for game in games]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,263 @@
+from clash.occupancy import ARENA_WIDTH, ARENA_HEIGHT
+import heapq
+import math
+
+# Troops look their heading up in a precomputed flow field instead of working it out every tick.
+# Troops going for a building use that tower's field, which covers the whole walk there, over
+# the bridge and around the other towers. Troops chasing a troop over the river use the field
+# to the bridge in its lane, one per (side of the river the troop is on, lane). Each field is a
+# grid of unit headings over the arena.
+
+CELL_SIZE = 10
+COLS = ARENA_WIDTH // CELL_SIZE
+ROWS = ARENA_HEIGHT // CELL_SIZE
+
+# Fields lead to a point this far past the river in the bridge's lane so troops walk all the way over
+GOAL_OFFSET = 25
+
+# Cells closer than twice this to the goal can always see it
+SIGHT_STEP = CELL_SIZE / 2
+
+NEIGHBOURS = [(dx, dy, math.hypot(dx, dy)) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+# (neighbour, cost, side, side) for every cell, a move is open if none of the three cells are
+# blocked. The sides are the two cells a diagonal cuts the corner of, or the neighbour again.
+def _NeighbourTable():
+    table = []
+
+    for index in range(COLS * ROWS):
+        row, col = divmod(index, COLS)
+        moves = []
+
+        for dx, dy, cost in NEIGHBOURS:
+            c, r = col + dx, row + dy
+
+            if not (0 <= c < COLS and 0 <= r < ROWS): continue
+
+            neighbour = r * COLS + c
+
+            if dx and dy:
+                moves.append((neighbour, cost, row * COLS + c, r * COLS + col))
+            else:
+                moves.append((neighbour, cost, neighbour, neighbour))
+
+        table.append(moves)
+
+    return table
+
+NEIGHBOUR_TABLE = _NeighbourTable()
+
+def _InRect(x, y, rect) -> bool:
+    left, top, w, h = rect
+
+    return left <= x <= left + w and top <= y <= top + h
+
+# Looked up for every moving troop every tick, so the clamping is spelled out rather than min/max
+def CellIndex(x, y) -> int:
+    col = int(x // CELL_SIZE)
+    row = int(y // CELL_SIZE)
+
+    if col < 0: col = 0
+    elif col >= COLS: col = COLS - 1
+
+    if row < 0: row = 0
+    elif row >= ROWS: row = ROWS - 1
+
+    return row * COLS + col
+
+def _CellCentre(index):
+    row, col = divmod(index, COLS)
+
+    return (col + 0.5) * CELL_SIZE, (row + 0.5) * CELL_SIZE
+
+CENTRES = [_CellCentre(index) for index in range(COLS * ROWS)]
+
+class FlowField():
+    # Headings are only worked out for cells in rows, the side of the river that uses this field
+    def __init__(self, goal, blocked, rows):
+        self.goal = goal
+
+        size = COLS * ROWS
+
+        # Unit heading for a troop standing in each cell, the same form as Troop.headingX/headingY
+        self.headingX = [0.0] * size
+        self.headingY = [0.0] * size
+
+        distance = self._Distances(blocked)
+        visible = self._Visible(blocked)
+
+        for index in range(rows.start * COLS, rows.stop * COLS):
+            x, y = CENTRES[index]
+
+            # Cells on the edge of a wall (the troop is only partly in it) step off it towards
+            # the goal like any other cell
+            downhill = None if visible[index] else self._Downhill(index, distance, blocked)
+
+            if downhill is None:
+                # Head straight for the goal. Troops pushed deep into a wall do this too, it's what
+                # they always did and gets them back out.
+                dx, dy = goal[0] - x, goal[1] - y
+            else:
+                dx, dy = downhill
+
+            length = math.sqrt(dx * dx + dy * dy)
+
+            if length > 0:
+                dx, dy = dx / length, dy / length
+
+            self.headingX[index] = dx
+            self.headingY[index] = dy
+
+    # Path length from every open cell to the goal, moving between neighbouring open cells
+    def _Distances(self, blocked):
+        distance = [math.inf] * (COLS * ROWS)
+        start = CellIndex(*self.goal)
+
+        distance[start] = 0
+        queue = [(0, start)]
+
+        while queue:
+            d, index = heapq.heappop(queue)
+
+            if d > distance[index]: continue
+
+            for neighbour, cost, sideA, sideB in NEIGHBOUR_TABLE[index]:
+                if blocked[neighbour] or blocked[sideA] or blocked[sideB]: continue
+
+                if d + cost < distance[neighbour]:
+                    distance[neighbour] = d + cost
+                    heapq.heappush(queue, (d + cost, neighbour))
+
+        return distance
+
+    # Open neighbours, diagonals only if they don't cut a corner
+    def _Moves(self, index, blocked):
+        return [(neighbour, cost) for neighbour, cost, sideA, sideB in NEIGHBOUR_TABLE[index]
+                if not (blocked[neighbour] or blocked[sideA] or blocked[sideB])]
+
+    # Offset to the neighbour with the shortest way on, None if no neighbour can reach the goal
+    def _Downhill(self, index, distance, blocked):
+        best = min(self._Moves(index, blocked), key=lambda move: distance[move[0]] + move[1], default=None)
+
+        if best is None or distance[best[0]] == math.inf:
+            return None
+
+        best = best[0]
+
+        x, y = CENTRES[index]
+        bx, by = CENTRES[best]
+
+        return bx - x, by - y
+
+    # Whether each open cell has a clear line to the goal. Cells are done nearest first, each one
+    # can see the goal if the cell a step towards it along that line can.
+    def _Visible(self, blocked):
+        goalX, goalY = self.goal
+        visible = [False] * (COLS * ROWS)
+
+        for index in sorted(range(COLS * ROWS), key=lambda i: math.dist(CENTRES[i], self.goal)):
+            if blocked[index]: continue
+
+            x, y = CENTRES[index]
+            dx, dy = goalX - x, goalY - y
+            length = math.sqrt(dx * dx + dy * dy)
+
+            if length < 2 * SIGHT_STEP:
+                visible[index] = True
+            else:
+                visible[index] = visible[CellIndex(x + dx / length * CELL_SIZE, y + dy / length * CELL_SIZE)]
+
+        return visible
+
+def _BlockedCells(obstacles):
+    blocked = [False] * (COLS * ROWS)
+
+    for index in range(COLS * ROWS):
+        x, y = CENTRES[index]
+        blocked[index] = any(_InRect(x, y, rect) for rect in obstacles)
+
+    return blocked
+
+# Every field for an arena with the towers in fallen destroyed. Their boxes are open ground, so a
+# tower falling swaps the game over to the fields from Fallen(index). Fields are built the first
+# time they're asked for, most games only ever use a few.
+class FlowFields():
+    def __init__(self, riverY, bridges, obstacles, towerBoxes=(), fallen=frozenset()):
+        self.riverY = riverY
+        self.bridges = tuple(bridges)
+        self.obstacles = tuple(tuple(rect) for rect in obstacles)
+        self.towerBoxes = tuple(tuple(rect) for rect in towerBoxes)
+        self.fallen = frozenset(fallen)
+
+        # What the fields were built from, pickles only carry this
+        self.layout = (riverY, self.bridges, self.obstacles, self.towerBoxes, self.fallen)
+
+        standing = [rect for i, rect in enumerate(self.towerBoxes) if i not in self.fallen]
+        self.blocked = _BlockedCells(self.obstacles + tuple(standing))
+
+        # Side 0 is below the river (blue) heading up, side 1 is above heading down. Rows the
+        # river runs through are in both, troops pick a side by y > riverY.
+        belowRiver = range(int(riverY // CELL_SIZE), ROWS)
+        aboveRiver = range(0, int(riverY // CELL_SIZE) + 1)
+
+        self.bridgeGoals = [
+            ((bridgeX, goalY), rows)
+            for goalY, rows in [(riverY - GOAL_OFFSET, belowRiver), (riverY + GOAL_OFFSET, aboveRiver)]
+            for bridgeX in self.bridges
+        ]
+
+        self.fields = [None] * len(self.bridgeGoals)
+        self.towerFields = [None] * len(self.towerBoxes)
+
+    # Unpickling (e.g. a replay keyframe) picks up this process's copy instead of storing the fields
+    def __reduce__(self):
+        return GetFlowFields, self.layout
+
+    # Field for a troop at height y crossing by the bridge in lane (an index into bridges)
+    def Field(self, y, lane) -> FlowField:
+        index = (0 if y > self.riverY else len(self.bridges)) + lane
+
+        return self.BridgeField(index)
+
+    def BridgeField(self, index) -> FlowField:
+        field = self.fields[index]
+
+        if field is None:
+            goal, rows = self.bridgeGoals[index]
+            field = self.fields[index] = FlowField(goal, self.blocked, rows)
+
+        return field
+
+    # Field over the whole arena leading to tower index, whose own box is open so the path can end in it
+    def Tower(self, index) -> FlowField:
+        field = self.towerFields[index]
+
+        if field is None:
+            box = self.towerBoxes[index]
+            left, top, w, h = box
+
+            blocked = list(self.blocked)
+
+            for cell in range(COLS * ROWS):
+                if blocked[cell] and _InRect(*CENTRES[cell], box):
+                    blocked[cell] = False
+
+            field = self.towerFields[index] = FlowField((left + w / 2, top + h / 2), blocked, range(0, ROWS))
+
+        return field
+
+    # The fields for this arena once tower index has been destroyed as well
+    def Fallen(self, index) -> "FlowFields":
+        return GetFlowFields(self.riverY, self.bridges, self.obstacles, self.towerBoxes, self.fallen | {index})
+
+_CACHE = {}
+
+# Fields only depend on the arena layout, so each process builds them once, the first time a game asks
+def GetFlowFields(riverY, bridges, obstacles, towerBoxes=(), fallen=frozenset()) -> FlowFields:
+    key = (riverY, tuple(bridges), tuple(tuple(rect) for rect in obstacles),
+           tuple(tuple(rect) for rect in towerBoxes), frozenset(fallen))
+
+    if key not in _CACHE:
+        _CACHE[key] = FlowFields(*key)
+
+    return _CACHE[key]
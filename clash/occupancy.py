@@ -0,0 +1,69 @@
+# One byte per arena unit saying what a troop stepping there runs into, so collision is a single
+# lookup instead of a test against every obstacle and tower box
+
+# Size of the arena in game units, the flow fields and observation spaces use these too
+ARENA_WIDTH = 450
+ARENA_HEIGHT = 600
+
+FREE = 0
+RIVER = 1
+
+# Tower i's footprint is stored as TOWER + i so it can be cleared when that tower dies
+TOWER = 2
+
+_TEMPLATES = {}
+
+# Cells [left, left + w) x [top, top + h) of each box, the same as the old inclusive rectangle
+# tests apart from points exactly on the far edges
+def BuildTemplate(river, towerBoxes) -> bytes:
+    cells = bytearray(ARENA_WIDTH * ARENA_HEIGHT)
+
+    boxes = [(rect, RIVER) for rect in river] + [(rect, TOWER + i) for i, rect in enumerate(towerBoxes)]
+
+    for (left, top, w, h), value in boxes:
+        left, right = max(0, left), min(ARENA_WIDTH, left + w)
+
+        for y in range(max(0, top), min(ARENA_HEIGHT, top + h)):
+            cells[y * ARENA_WIDTH + left:y * ARENA_WIDTH + right] = bytes([value]) * (right - left)
+
+    return bytes(cells)
+
+# The static layout is only built once per process, every game starts from a copy of it
+def GetTemplate(river, towerBoxes) -> bytes:
+    key = (tuple(map(tuple, river)), tuple(map(tuple, towerBoxes)))
+
+    if key not in _TEMPLATES:
+        _TEMPLATES[key] = BuildTemplate(river, towerBoxes)
+
+    return _TEMPLATES[key]
+
+class OccupancyGrid():
+    def __init__(self, river, towerBoxes):
+        self.towerBoxes = towerBoxes
+        self.cells = bytearray(GetTemplate(river, towerBoxes))
+
+    # FREE, RIVER or TOWER + tower index. Everything outside the arena is free
+    def At(self, x, y) -> int:
+        if 0 <= x < ARENA_WIDTH and 0 <= y < ARENA_HEIGHT:
+            return self.cells[int(y) * ARENA_WIDTH + int(x)]
+
+        return FREE
+
+    # Troops can walk over a destroyed tower
+    def ClearTower(self, index) -> None:
+        value = TOWER + index
+        left, top, w, h = self.towerBoxes[index]
+
+        for y in range(max(0, top), min(ARENA_HEIGHT, top + h)):
+            start = y * ARENA_WIDTH
+
+            for x in range(max(0, left), min(ARENA_WIDTH, left + w)):
+                if self.cells[start + x] == value:
+                    self.cells[start + x] = FREE
+
+    def Copy(self) -> "OccupancyGrid":
+        copy = object.__new__(OccupancyGrid)
+        copy.towerBoxes = self.towerBoxes
+        copy.cells = bytearray(self.cells)
+
+        return copy
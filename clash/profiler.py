@@ -0,0 +1,182 @@
+import json
+import time
+
+Clock = time.perf_counter_ns
+
+# The parts of Troop.Tick timed through Lap, in the order they run
+TROOP_PHASES = ("targeting", "attack", "separation", "collision")
+
+# Where Game.Tick spends its time, broken down by phase. Attach one with game.profiler = TickProfiler(),
+# and share the same one between games (or Merge them) to aggregate across games. Game.Tick tells
+# it as each phase finishes, games without a profiler tell NO_PROFILER, which does nothing.
+#
+# Phases are paths like ("Tick", "Troop.Tick", "targeting"). Each path has a total time (including
+# its children) and how many times it ran.
+class TickProfiler():
+    def __init__(self):
+        # path tuple -> nanoseconds
+        self.times = {}
+
+        # path tuple -> calls
+        self.calls = {}
+
+        self.games = 0
+        self.ticks = 0
+
+        # When the tick, the current phase and the current troop phase started
+        self.tickStart = 0
+        self.phaseStart = 0
+        self.lapStart = 0
+
+        # Troop phases are summed here and added once a tick, the dict updates would cost more than the phases
+        self.troopTimes = dict.fromkeys(TROOP_PHASES, 0)
+        self.troopCalls = dict.fromkeys(TROOP_PHASES, 0)
+
+    def StartTick(self) -> None:
+        self.ticks += 1
+        self.tickStart = self.phaseStart = Clock()
+
+    # Everything since the last phase finished goes down as ("Tick", name)
+    def Phase(self, name, calls=1) -> None:
+        now = Clock()
+
+        self.Add(("Tick", name), now - self.phaseStart, calls)
+        self.phaseStart = now
+
+    def EndTick(self) -> None:
+        self.Add(("Tick",), Clock() - self.tickStart)
+
+    # The troop phase of the tick. Each troop's own Tick runs as normal and calls Lap as it goes
+    def TickTroops(self, troops, dt) -> None:
+        alive = 0
+
+        for troop in troops:
+            if troop.dead: continue
+
+            alive += 1
+
+            self.lapStart = Clock()
+            troop.Tick(dt)
+
+        for phase in TROOP_PHASES:
+            self.Add(("Tick", "Troop.Tick", phase), self.troopTimes[phase], self.troopCalls[phase])
+
+            self.troopTimes[phase] = 0
+            self.troopCalls[phase] = 0
+
+        self.Phase("Troop.Tick", alive)
+
+    # Everything since the troop's last phase finished goes down as phase
+    def Lap(self, phase) -> None:
+        now = Clock()
+
+        self.troopTimes[phase] += now - self.lapStart
+        self.troopCalls[phase] += 1
+        self.lapStart = now
+
+    def Add(self, path, nanoseconds, calls=1) -> None:
+        self.times[path] = self.times.get(path, 0) + nanoseconds
+        self.calls[path] = self.calls.get(path, 0) + calls
+
+    def Merge(self, other) -> None:
+        if isinstance(other, dict):
+            other = TickProfiler.FromDict(other)
+
+        for path, nanoseconds in other.times.items():
+            self.Add(path, nanoseconds, other.calls[path])
+
+        self.games += other.games
+        self.ticks += other.ticks
+
+    # Time spent in path itself, not in any of the phases under it
+    def SelfTime(self, path) -> int:
+        children = sum(t for p, t in self.times.items() if len(p) == len(path) + 1 and p[:len(path)] == path)
+
+        return max(0, self.times[path] - children)
+
+    def ToDict(self) -> dict:
+        phases = []
+
+        for path in sorted(self.times):
+            phases.append({
+                "phase": ";".join(path),
+                "calls": self.calls[path],
+                "totalMs": self.times[path] / 1e6,
+                "selfMs": self.SelfTime(path) / 1e6,
+                "perCallUs": self.times[path] / self.calls[path] / 1e3 if self.calls[path] else 0,
+            })
+
+        return {"games": self.games, "ticks": self.ticks, "phases": phases}
+
+    @staticmethod
+    def FromDict(data) -> "TickProfiler":
+        profiler = TickProfiler()
+        profiler.games = data["games"]
+        profiler.ticks = data["ticks"]
+
+        for phase in data["phases"]:
+            path = tuple(phase["phase"].split(";"))
+
+            profiler.times[path] = round(phase["totalMs"] * 1e6)
+            profiler.calls[path] = phase["calls"]
+
+        return profiler
+
+    def ToJSON(self, path=None) -> str:
+        text = json.dumps(self.ToDict(), indent=1)
+
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+
+        return text
+
+    # One "frame;frame;frame microseconds" line per phase, the input format for flamegraph.pl,
+    # speedscope and friends
+    def ToCollapsed(self, path=None) -> str:
+        lines = []
+
+        for phase in sorted(self.times):
+            microseconds = self.SelfTime(phase) // 1000
+
+            if microseconds > 0:
+                lines.append(f"{';'.join(phase)} {microseconds}")
+
+        text = "\n".join(lines) + "\n"
+
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+
+        return text
+
+    def Summary(self) -> str:
+        total = self.times.get(("Tick",), 0) or 1
+
+        lines = [f"{self.games} games, {self.ticks} ticks"]
+
+        for path in sorted(self.times):
+            share = self.times[path] / total * 100
+            perCall = self.times[path] / self.calls[path] / 1e3 if self.calls[path] else 0
+
+            lines.append(f"{'  ' * (len(path) - 1)}{path[-1]:<{24 - 2 * len(path)}} {share:6.1f}%  "
+                         f"{self.calls[path]:>10} calls  {perCall:8.2f}us/call")
+
+        return "\n".join(lines)
+
+# What games without a profiler tell their phases to
+class NullProfiler():
+    def StartTick(self) -> None:
+        pass
+
+    def Phase(self, name, calls=1) -> None:
+        pass
+
+    def EndTick(self) -> None:
+        pass
+
+    def TickTroops(self, troops, dt) -> None:
+        for troop in troops:
+            troop.Tick(dt)
+
+NO_PROFILER = NullProfiler()
@@ -0,0 +1,291 @@
+from typing import Optional
+from clash.game import *
+import bisect
+import pickle
+import struct
+import zlib
+
+# Replays are an append-only stream of records after a header. A game is fully determined by
+# its seed and the cards played, so that's all that's needed, keyframes just make seeking fast.
+#
+# Header:   MAGIC, version u8, seed i64, dt f64, blue name, red name (u16 length + utf-8)
+# Records:  b"A" tick u32, player u8, hand index u8, between ticks u8, x f64, y f64
+#           b"D" tick u32, dt f64                    dt changed from this tick on
+#           b"K" tick u32, size u32, zlib(pickle)    state after `tick` ticks
+#           b"E" tick u32, winner i8                 -1 for a timeout
+
+MAGIC = b"CRRP"
+VERSION = 1
+
+HEADER = struct.Struct("<Bqd")
+ACTION = struct.Struct("<IBBBdd")
+DT_CHANGE = struct.Struct("<Id")
+KEYFRAME = struct.Struct("<II")
+END = struct.Struct("<Ib")
+
+def _WriteString(f, text) -> None:
+    data = text.encode("utf-8")
+    f.write(struct.pack("<H", len(data)))
+    f.write(data)
+
+def _ReadString(f) -> str:
+    size, = struct.unpack("<H", f.read(2))
+    return f.read(size).decode("utf-8")
+
+# Plays back recorded cards at the same point in the tick the original player did
+class ReplayPlayer(Player):
+    def __init__(self, game, isFocused):
+        super().__init__(game, isFocused)
+
+        # tick -> [(hand index, x, y)], filled in by ReplayReader
+        self.schedule = {}
+
+    def Tick(self, dt):
+        for index, x, y in self.schedule.get(self.game.ticks, ()):
+            self.PlaceCard(x, y, index)
+
+# Attributes every Player has, anything else an agent added is left out of keyframes
+_PLAYER_FIELDS = None
+
+def _PlayerFields():
+    global _PLAYER_FIELDS
+
+    if _PLAYER_FIELDS is None:
+        _PLAYER_FIELDS = set(Game(Player, Player, verbose=False, seed=0).players[0].__dict__)
+
+    return _PLAYER_FIELDS
+
+# Keyframes are a fork of the game with the agents swapped for ReplayPlayers, so loading
+# one never needs the agent code
+def EncodeKeyframe(game) -> bytes:
+    fork = game.Fork()
+    fields = _PlayerFields()
+
+    for player in fork.players:
+        state = {key: value for key, value in player.__dict__.items() if key in fields}
+
+        player.__class__ = ReplayPlayer
+        player.__dict__ = state
+        player.schedule = {}
+
+        # Recorded cards say exactly which tick they were played on, so replays tick every player every tick
+        player.scheduler = None
+
+    return zlib.compress(pickle.dumps(fork, pickle.HIGHEST_PROTOCOL))
+
+def DecodeKeyframe(data: bytes):
+    return pickle.loads(zlib.decompress(data))
+
+# Observer that writes a replay of the game it's attached to. Needs its Tick called before
+# each game tick like any other observer (main.py does this), cards are caught as they're played.
+class ReplayRecorder():
+    def __init__(self, file, keyframeInterval: Optional[int] = None):
+        # Path or an open binary file
+        self.ownsFile = isinstance(file, str)
+        self.file = open(file, "wb") if self.ownsFile else file
+
+        # Ticks between keyframes, None for none at all
+        self.keyframeInterval = keyframeInterval
+
+        self.started = False
+        self.closed = False
+        self.dt = None
+
+    def Start(self, game) -> None:
+        if self.started: return
+
+        # Replays re-simulate one tick at a time, which a fast forwarded game only matches to rounding
+        if getattr(game, "fastForward", False):
+            raise ValueError("Can't record a fast forwarded game")
+
+        self.started = True
+
+        self.file.write(MAGIC)
+        self.file.write(HEADER.pack(VERSION, game.rng.seed, FIXED_DT))
+
+        for player in game.players:
+            _WriteString(self.file, type(player).__name__)
+
+        self.dt = FIXED_DT
+
+    def Tick(self, dt, game) -> bool:
+        if self.closed: return True
+
+        self.Start(game)
+
+        if dt != self.dt:
+            self.file.write(b"D" + DT_CHANGE.pack(game.ticks + 1, dt))
+            self.dt = dt
+
+        if self.keyframeInterval and game.ticks % self.keyframeInterval == 0 and hasattr(game, "Fork"):
+            data = EncodeKeyframe(game)
+
+            self.file.write(b"K" + KEYFRAME.pack(game.ticks, len(data)))
+            self.file.write(data)
+
+        return True
+
+    def CardPlaced(self, game, player, x, y, index) -> None:
+        if self.closed: return
+
+        self.Start(game)
+
+        # Cards played outside the player phase (e.g. by an env before ticking) happen
+        # between ticks, after `ticks` ticks have run
+        betweenTicks = not game.playerPhase
+
+        self.file.write(b"A" + ACTION.pack(game.ticks, game.players.index(player), index, betweenTicks, x, y))
+
+    def GameOver(self, game) -> None:
+        if self.closed: return
+
+        self.Start(game)
+
+        winner = game.players.index(game.winner) if game.winner is not None else -1
+
+        self.file.write(b"E" + END.pack(game.ticks, winner))
+
+        self.Close()
+
+    def Close(self) -> None:
+        if self.closed: return
+
+        self.closed = True
+
+        if self.ownsFile:
+            self.file.close()
+        else:
+            self.file.flush()
+
+# Streams a replay file. Records() walks it without loading keyframes, Start() and Step()
+# re-simulate the game, Seek() jumps to any tick using the nearest keyframe.
+class ReplayReader():
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a replay")
+
+            version, self.seed, self.dt = HEADER.unpack(f.read(HEADER.size))
+
+            if version != VERSION:
+                raise ValueError(f"Unsupported replay version {version}")
+
+            self.playerNames = [_ReadString(f), _ReadString(f)]
+            self.recordsStart = f.tell()
+
+        # [player][tick] -> [(hand index, x, y)]
+        self.inTick = [{}, {}]
+
+        # tick -> [(player, hand index, x, y)] played after that many ticks
+        self.betweenTicks = {}
+
+        # [(from tick, dt)]
+        self.dtChanges = [(1, self.dt)]
+
+        # tick -> file offset of the keyframe payload
+        self.keyframes = {}
+
+        self.endTick = None
+        self.winner = None
+
+        for record in self.Records():
+            kind = record[0]
+
+            if kind == b"A":
+                tick, player, index, between, x, y = record[1:]
+
+                if between:
+                    self.betweenTicks.setdefault(tick, []).append((player, index, x, y))
+                else:
+                    self.inTick[player].setdefault(tick, []).append((index, x, y))
+
+            elif kind == b"D":
+                self.dtChanges.append(record[1:])
+
+            elif kind == b"K":
+                self.keyframes[record[1]] = record[2]
+
+            elif kind == b"E":
+                self.endTick, self.winner = record[1:]
+
+        self.dtStarts = [start for start, dt in self.dtChanges]
+
+    # Yields (kind, *fields) for each record. Keyframes come out as (b"K", tick, offset)
+    def Records(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.recordsStart)
+
+            while True:
+                kind = f.read(1)
+
+                if not kind:
+                    return
+
+                if kind == b"A":
+                    yield (kind, *ACTION.unpack(f.read(ACTION.size)))
+                elif kind == b"D":
+                    yield (kind, *DT_CHANGE.unpack(f.read(DT_CHANGE.size)))
+                elif kind == b"K":
+                    tick, size = KEYFRAME.unpack(f.read(KEYFRAME.size))
+                    offset = f.tell()
+
+                    f.seek(size, 1)
+
+                    yield (kind, tick, (offset, size))
+                elif kind == b"E":
+                    yield (kind, *END.unpack(f.read(END.size)))
+                else:
+                    raise ValueError(f"Corrupt replay record {kind!r}")
+
+    def DtForTick(self, tick) -> float:
+        i = bisect.bisect_right(self.dtStarts, tick) - 1
+
+        return self.dtChanges[i][1]
+
+    def _Attach(self, game):
+        for i, player in enumerate(game.players):
+            player.schedule = self.inTick[i]
+
+        return game
+
+    def LoadKeyframe(self, tick):
+        offset, size = self.keyframes[tick]
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return self._Attach(DecodeKeyframe(f.read(size)))
+
+    # A game ready to run from tick, using the latest keyframe at or before it if there is one
+    def Start(self, tick: int = 0):
+        before = [t for t in self.keyframes if t <= tick]
+
+        if before:
+            game = self.LoadKeyframe(max(before))
+        else:
+            game = self._Attach(Game(ReplayPlayer, ReplayPlayer, verbose=False, seed=self.seed))
+
+        while game.running and game.ticks < tick:
+            self.Step(game)
+
+        return game
+
+    def Seek(self, tick: int):
+        return self.Start(tick)
+
+    # Runs one tick with whatever was played around it
+    def Step(self, game) -> None:
+        for player, index, x, y in self.betweenTicks.get(game.ticks, ()):
+            game.players[player].PlaceCard(x, y, index)
+
+        game.Tick(self.DtForTick(game.ticks + 1))
+
+    # Re-simulates the whole game, returns the finished game
+    def Simulate(self):
+        game = self.Start()
+
+        while game.running:
+            self.Step(game)
+
+        return game
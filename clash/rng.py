@@ -0,0 +1,50 @@
+import random
+
+# How many spawn offsets get generated at once
+BLOCK_SIZE = 1024
+
+# Each game owns one of these so it can be replayed from its seed. Spawn offsets are
+# handed out from pregenerated blocks since multi-unit cards ask for lots of them at once.
+class GameRandom():
+    def __init__(self, seed=None, spread=10):
+        # Always have a concrete seed so any game can be replayed
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**63)
+
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        # Offsets are in [-spread, spread)
+        self.spread = spread
+        self.offsets = []
+
+    def Offset(self) -> int:
+        if not self.offsets:
+            self.offsets = self.random.choices(range(-self.spread, self.spread), k=BLOCK_SIZE)
+
+        return self.offsets.pop()
+
+    def Shuffle(self, items) -> None:
+        self.random.shuffle(items)
+
+    # A separate generator seeded from this one, e.g. for an agent's own decisions
+    def Derive(self) -> random.Random:
+        return random.Random(self.random.getrandbits(64))
+
+    def Copy(self) -> "GameRandom":
+        copy = object.__new__(GameRandom)
+        copy.seed = self.seed
+        copy.spread = self.spread
+        copy.offsets = list(self.offsets)
+        copy.random = CopyRandom(self.random)
+
+        return copy
+
+def CopyRandom(rng):
+    if isinstance(rng, GameRandom):
+        return rng.Copy()
+
+    copy = random.Random()
+    copy.setstate(rng.getstate())
+
+    return copy
@@ -0,0 +1,88 @@
+from clash.troops import RIVER_Y
+
+# Wake conditions are armed with DecisionScheduler.Wake and checked every tick until the next decision
+
+class WakeCondition():
+    def Check(self, player) -> bool:
+        return False
+
+class ElixirAtLeast(WakeCondition):
+    def __init__(self, amount: float):
+        self.amount = amount
+
+    def Check(self, player) -> bool:
+        return player.elixir >= self.amount
+
+# Fires when an enemy troop reaches our side of the river, ignoring any that were already there
+# the first time it was checked
+class EnemyCrossedRiver(WakeCondition):
+    def __init__(self):
+        # A list rather than a set so Game.Fork remaps it to the forked troops
+        self.seen = None
+
+    def Check(self, player) -> bool:
+        crossed = [t for t in player.game.troops if t.owner != player and not t.dead and
+                   (t.y > RIVER_Y if player.isFocused else t.y < RIVER_Y)]
+
+        if self.seen is None:
+            self.seen = crossed
+            return False
+
+        if any(t not in self.seen for t in crossed):
+            return True
+
+        return False
+
+# Decides when a player's Tick actually runs. A player with no scheduler is ticked every game
+# tick like before, one with a scheduler only when it's due: on the first tick, every interval
+# seconds if there is one, or as soon as one of the conditions armed since its last decision holds.
+# Player.Tick gets the time since its last decision as dt.
+class DecisionScheduler():
+    def __init__(self, interval=None):
+        # Seconds between decisions, None to only wake on conditions
+        self.interval = interval
+
+        # Game time of the last decision, None before the first
+        self.lastDecision = None
+
+        self.conditions = []
+
+        # How many times the player has actually been ticked
+        self.decisions = 0
+
+    # Arms conditions for the next decision, they're cleared once it happens
+    def Wake(self, *conditions) -> None:
+        self.conditions.extend(conditions)
+
+    def Due(self, player) -> bool:
+        if self.lastDecision is None:
+            return True
+
+        # Small tolerance so an interval that's a whole number of ticks doesn't slip a tick to rounding
+        if self.interval is not None and player.game.lifetime - self.lastDecision >= self.interval - 1e-9:
+            return True
+
+        for condition in self.conditions:
+            if condition.Check(player):
+                return True
+
+        return False
+
+    def Decide(self, player, dt: float) -> None:
+        now = player.game.lifetime
+        elapsed = dt if self.lastDecision is None else now - self.lastDecision
+
+        self.lastDecision = now
+        self.conditions = []
+        self.decisions += 1
+
+        player.Tick(elapsed)
+
+# What the games run in their player phase
+def TickPlayer(player, dt: float) -> None:
+    scheduler = player.scheduler
+
+    if scheduler is None:
+        player.Tick(dt)
+    elif scheduler.Due(player):
+        scheduler.Decide(player, dt)
@@ -0,0 +1,405 @@
+from multiprocessing import Process
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+from clash.troops import TroopType
+from clash.stats import CARDS
+import numpy as np
+import math
+import time
+
+# Watching a game without slowing it down. A SnapshotPublisher observer copies what the GUI needs
+# into a ring of slots in shared memory, and a render process (AsyncRenderer) draws the newest one,
+# interpolating troops between the last two so it looks smooth however fast the game is going.
+
+RING_SLOTS = 8
+
+MAX_TROOPS = 256
+MAX_PROJECTILES = 64
+MAX_TOWERS = 6
+
+CARD_NAMES = tuple(CARDS)
+HAND = 5
+
+TROOP_DTYPE = np.dtype([
+    # Stays the same for a troop's whole life so the renderer can match it up between snapshots
+    ("id", np.int64),
+    ("type", np.int8),
+    ("blue", np.bool_),
+    ("air", np.bool_),
+    ("x", np.float32),
+    ("y", np.float32),
+    ("headingX", np.float32),
+    ("headingY", np.float32),
+    ("health", np.float32),
+    ("maxHealth", np.float32),
+])
+
+TOWER_DTYPE = np.dtype([
+    ("blue", np.bool_),
+    ("active", np.bool_),
+    ("dead", np.bool_),
+    ("x", np.float32),
+    ("y", np.float32),
+    ("health", np.float32),
+    ("maxHealth", np.float32),
+])
+
+PROJECTILE_DTYPE = np.dtype([
+    ("x", np.float32),
+    ("y", np.float32),
+    ("dirX", np.float32),
+    ("dirY", np.float32),
+    # 0 for single target shots
+    ("radius", np.float32),
+])
+
+SNAPSHOT_DTYPE = np.dtype([
+    # Which write this slot holds, -1 while it's being written
+    ("sequence", np.int64),
+    ("tick", np.int64),
+    ("lifetime", np.float64),
+    ("running", np.bool_),
+    # The focused player's, as indices into CARD_NAMES
+    ("elixir", np.float32),
+    ("hand", np.int8, HAND),
+    ("towerCount", np.int32),
+    ("troopCount", np.int32),
+    ("projectileCount", np.int32),
+    ("towers", TOWER_DTYPE, MAX_TOWERS),
+    ("troops", TROOP_DTYPE, MAX_TROOPS),
+    ("projectiles", PROJECTILE_DTYPE, MAX_PROJECTILES),
+])
+
+# Sequence number of the newest complete snapshot, and whether the publisher is done
+HEADER_DTYPE = np.dtype([("latest", np.int64), ("closed", np.int64)])
+
+# Fixed number of snapshot slots in shared memory, written round robin. Make one with no name to
+# create the memory, or pass the name of an existing ring to attach to it from another process.
+class SnapshotRing():
+    def __init__(self, name: Optional[str] = None, slots: int = RING_SLOTS):
+        size = HEADER_DTYPE.itemsize + SNAPSHOT_DTYPE.itemsize * slots
+
+        self.owner = name is None
+        self.memory = SharedMemory(name=name, create=self.owner, size=size)
+
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=self.memory.buf)
+
+        # Attaching finds out the slot count from the size of the memory
+        slots = (self.memory.size - HEADER_DTYPE.itemsize) // SNAPSHOT_DTYPE.itemsize
+        self.slots = np.ndarray((slots,), SNAPSHOT_DTYPE, buffer=self.memory.buf, offset=HEADER_DTYPE.itemsize)
+
+        if self.owner:
+            self.header["latest"] = -1
+            self.header["closed"] = 0
+            self.slots["sequence"] = -1
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.header["closed"])
+
+    # Hands fill(slot) the next slot to write into, readers never see it half written
+    def Publish(self, fill) -> None:
+        sequence = int(self.header["latest"]) + 1
+        slot = self.slots[sequence % len(self.slots)]
+
+        slot["sequence"] = -1
+        fill(slot)
+        slot["sequence"] = sequence
+
+        self.header["latest"] = sequence
+
+    # Copy of the newest snapshot, None if there isn't one yet (or it was overwritten while copying)
+    def Latest(self):
+        sequence = int(self.header["latest"])
+
+        if sequence < 0: return None
+
+        slot = self.slots[sequence % len(self.slots)]
+        snapshot = slot.copy()
+
+        # The writer lapped us while we copied, the next frame will get a clean one
+        if snapshot["sequence"] != sequence or slot["sequence"] != sequence:
+            return None
+
+        return snapshot
+
+    def Close(self) -> None:
+        self.header["closed"] = 1
+
+    def Release(self) -> None:
+        del self.header, self.slots
+
+        self.memory.close()
+
+        if self.owner:
+            self.memory.unlink()
+
+# Observer that publishes the game into a SnapshotRing, at most maxRate times a (real) second so
+# a game running flat out doesn't spend its time copying. None publishes every tick.
+class SnapshotPublisher():
+    def __init__(self, ring: SnapshotRing, maxRate: Optional[float] = 120):
+        self.ring = ring
+        self.interval = 0 if not maxRate else 1 / maxRate
+
+        self.lastPublish = -math.inf
+
+        # Troop -> id, only troops in the last snapshot are kept
+        self.ids = {}
+        self.nextId = 0
+
+    def Tick(self, dt, game) -> None:
+        now = time.perf_counter()
+
+        if now - self.lastPublish < self.interval: return
+
+        self.lastPublish = now
+        self.Publish(game)
+
+    def GameOver(self, game) -> None:
+        self.Publish(game)
+
+    def Publish(self, game) -> None:
+        self.ring.Publish(lambda slot: self.Fill(slot, game))
+
+    def Fill(self, slot, game) -> None:
+        player = game.GetFocusedPlayer()
+
+        slot["tick"] = game.ticks
+        slot["lifetime"] = game.lifetime
+        slot["running"] = game.running
+        slot["elixir"] = player.elixir
+        slot["hand"] = [CARD_NAMES.index(card.cardName) for card in player.deck[:HAND]]
+
+        towers = game.towers[:MAX_TOWERS]
+
+        slot["towerCount"] = len(towers)
+        slot["towers"][:len(towers)] = [
+            (tower.owner.isFocused, tower.active, tower.dead, tower.x, tower.y, tower.health, tower.maxHealth)
+            for tower in towers
+        ]
+
+        troops = [troop for troop in game.troops if not troop.dead][:MAX_TROOPS]
+        ids = {}
+
+        for troop in troops:
+            id = self.ids.get(troop)
+
+            if id is None:
+                id = self.nextId
+                self.nextId += 1
+
+            ids[troop] = id
+
+        self.ids = ids
+
+        slot["troopCount"] = len(troops)
+        slot["troops"][:len(troops)] = [
+            (ids[troop], troop.troopType.value, troop.owner.isFocused, troop.air, troop.x, troop.y,
+             troop.headingX, troop.headingY, troop.health, troop.maxHealth)
+            for troop in troops
+        ]
+
+        projectiles = game.projectiles[:MAX_PROJECTILES]
+
+        slot["projectileCount"] = len(projectiles)
+        slot["projectiles"][:len(projectiles)] = [
+            (p.x, p.y, p.dirX, p.dirY, getattr(p, "radius", 0)) for p in projectiles
+        ]
+
+# Stand ins for the game's objects with just what the GUI reads, filled from snapshots
+
+class SnapshotOwner():
+    def __init__(self, isFocused):
+        self.isFocused = isFocused
+        self.owner = self
+
+BLUE = SnapshotOwner(True)
+RED = SnapshotOwner(False)
+
+class SnapshotCard():
+    def __init__(self, cardName):
+        self.cardName = cardName
+        self.cost = CARDS[cardName].cost
+
+SNAPSHOT_CARDS = [SnapshotCard(name) for name in CARD_NAMES]
+
+class SnapshotPlayer():
+    def __init__(self):
+        self.elixir = 0
+        self.deck = []
+        self.isFocused = True
+
+class SnapshotTower():
+    def __init__(self):
+        self.active = False
+
+class SnapshotTroop():
+    @property
+    def direction(self) -> float:
+        return math.degrees(math.atan2(-self.headingY, self.headingX))
+
+class SnapshotProjectile():
+    pass
+
+class SnapshotAOEProjectile():
+    pass
+
+# Looks enough like a Game for GUI.Tick. Update moves it to a point between two snapshots.
+class SnapshotGame():
+    def __init__(self):
+        self.player = SnapshotPlayer()
+
+        self.towers = []
+        self.troops = []
+        self.projectiles = []
+
+        self.ticks = 0
+        self.lifetime = 0
+        self.running = True
+
+        # Kept between frames so the GUI's draw order sees the same troops
+        self.troopViews = {}
+
+    def GetFocusedPlayer(self):
+        return self.player
+
+    # t = 0 shows previous, 1 shows latest. Troops that are only in latest just appear
+    def Update(self, previous, latest, t: float) -> None:
+        self.ticks = int(latest["tick"])
+        self.lifetime = float(latest["lifetime"])
+        self.running = bool(latest["running"])
+
+        self.player.elixir = float(latest["elixir"])
+        self.player.deck = [SNAPSHOT_CARDS[i] for i in latest["hand"]]
+
+        towers = latest["towers"][:latest["towerCount"]]
+
+        while len(self.towers) < len(towers):
+            self.towers.append(SnapshotTower())
+
+        for view, tower in zip(self.towers, towers):
+            view.owner = BLUE if tower["blue"] else RED
+            view.active = bool(tower["active"])
+            view.dead = bool(tower["dead"])
+            view.x, view.y = float(tower["x"]), float(tower["y"])
+            view.health, view.maxHealth = float(tower["health"]), float(tower["maxHealth"])
+
+        before = {}
+
+        if previous is not None and t < 1:
+            before = {int(troop["id"]): troop for troop in previous["troops"][:previous["troopCount"]]}
+
+        views = {}
+
+        for troop in latest["troops"][:latest["troopCount"]]:
+            id = int(troop["id"])
+
+            view = self.troopViews.get(id)
+
+            if view is None:
+                view = SnapshotTroop()
+                view.troopType = TroopType(int(troop["type"]))
+                view.owner = BLUE if troop["blue"] else RED
+                view.air = bool(troop["air"])
+
+            x, y = float(troop["x"]), float(troop["y"])
+
+            if id in before:
+                x0, y0 = float(before[id]["x"]), float(before[id]["y"])
+                x, y = x0 + (x - x0) * t, y0 + (y - y0) * t
+
+            view.x, view.y = x, y
+            view.headingX, view.headingY = float(troop["headingX"]), float(troop["headingY"])
+            view.health, view.maxHealth = float(troop["health"]), float(troop["maxHealth"])
+
+            views[id] = view
+
+        self.troopViews = views
+        self.troops = list(views.values())
+
+        self.projectiles = []
+
+        for p in latest["projectiles"][:latest["projectileCount"]]:
+            view = SnapshotAOEProjectile() if p["radius"] > 0 else SnapshotProjectile()
+
+            view.x, view.y = float(p["x"]), float(p["y"])
+            view.dirX, view.dirY = float(p["dirX"]), float(p["dirY"])
+
+            if p["radius"] > 0:
+                view.radius = float(p["radius"])
+
+            self.projectiles.append(view)
+
+# Runs in the render process until the publisher closes the ring and the last snapshot is on screen
+def _RenderMain(ringName: str, fps: int) -> None:
+    from clash.gui import GUI
+    from pygame import time as pygameTime
+
+    ring = SnapshotRing(ringName)
+    gui = GUI(prewarm=True)
+    clock = pygameTime.Clock()
+
+    view = SnapshotGame()
+
+    previous = latest = None
+
+    # Wall time the latest snapshot showed up, and how long after the one before
+    arrived = 0
+    interval = 0
+
+    try:
+        while True:
+            dt = clock.tick(fps) / 1000
+            now = time.perf_counter()
+
+            # Read before the snapshot so the last one can't slip in between
+            closed = ring.closed
+
+            snapshot = ring.Latest()
+
+            if snapshot is not None and (latest is None or snapshot["sequence"] != latest["sequence"]):
+                previous, latest = latest, snapshot
+
+                interval = now - arrived
+                arrived = now
+
+            if latest is None:
+                gui.ProcessEvents()
+
+                if closed: break
+                continue
+
+            t = min(1, (now - arrived) / interval) if previous is not None and interval > 0 else 1
+
+            view.Update(previous, latest, t)
+            gui.Tick(dt, view)
+
+            if closed and t == 1 and int(ring.header["latest"]) == int(latest["sequence"]):
+                break
+    finally:
+        ring.Release()
+
+# Starts a render process for games on this side to publish to. Add publisher as an observer (or
+# call publisher.Publish yourself), then Close() once the game is over to wait for the window.
+class AsyncRenderer():
+    def __init__(self, maxRate: Optional[float] = 120, fps: int = 60):
+        self.ring = SnapshotRing()
+        self.publisher = SnapshotPublisher(self.ring, maxRate)
+
+        self.process = Process(target=_RenderMain, args=(self.ring.name, fps), daemon=True)
+        self.process.start()
+
+    def Close(self) -> None:
+        self.ring.Close()
+        self.process.join()
+        self.ring.Release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.Close()
@@ -0,0 +1,98 @@
+from clash.game import *
+from clash.occupancy import ARENA_WIDTH, ARENA_HEIGHT
+
+# Shared action and observation layout for anything that trains on the game
+
+# Cards can be placed on a grid over the player's own half. Blue's half is below,
+# red uses the same grid mirrored in y.
+PLACEMENT_X = (50, 400)
+PLACEMENT_Y = (309, 520)
+PLACEMENT_COLS = 7
+PLACEMENT_ROWS = 4
+NUM_CELLS = PLACEMENT_COLS * PLACEMENT_ROWS
+
+# Action 0 waits, the rest are (hand slot, cell) pairs
+NUM_ACTIONS = 1 + HAND_SIZE * NUM_CELLS
+
+# Added to the last step's reward on a win, taken off on a loss
+WIN_REWARD = 1
+
+# Observations are always from the acting player's point of view: their towers come
+# first and y is flipped for red so "forward" is always up the screen
+MAX_OBSERVED_TROOPS = 32
+TROOP_FEATURES = 5 # side (+1 own, -1 enemy, 0 empty), type, x, y, health fraction
+
+OBS_ELIXIR = 0
+OBS_TIME = 1
+OBS_CARDS = 2 # hand then next card, as (deck index + 1) / len(DECK)
+OBS_TOWERS = OBS_CARDS + HAND_SIZE + 1 # health fraction, own three first
+OBS_TROOPS = OBS_TOWERS + len(TOWER_LAYOUT)
+OBSERVATION_SIZE = OBS_TROOPS + MAX_OBSERVED_TROOPS * TROOP_FEATURES
+
+# Largest TroopType value, used to scale the type feature into [0, 1]
+MAX_TROOP_TYPE = max(t.value for t in TroopType)
+
+def DecodeAction(action: int):
+    if action <= 0:
+        return None
+
+    slot, cell = divmod(action - 1, NUM_CELLS)
+
+    return slot, cell
+
+def EncodeAction(slot: int, cell: int) -> int:
+    return 1 + slot * NUM_CELLS + cell
+
+# Centre of a placement cell in arena coordinates. cell can also be an array of cells
+def CellPosition(cell, isFocused: bool):
+    col, row = cell % PLACEMENT_COLS, cell // PLACEMENT_COLS
+
+    x = PLACEMENT_X[0] + (col + 0.5) * (PLACEMENT_X[1] - PLACEMENT_X[0]) / PLACEMENT_COLS
+    y = PLACEMENT_Y[0] + (row + 0.5) * (PLACEMENT_Y[1] - PLACEMENT_Y[0]) / PLACEMENT_ROWS
+
+    if not isFocused:
+        y = ARENA_HEIGHT - y
+
+    return x, y
+
+# Tower slots in the order they appear in an observation for each player index
+def TowerOrder(playerIndex: int):
+    own = [i for i, layout in enumerate(TOWER_LAYOUT) if layout[2] == playerIndex]
+    enemy = [i for i, layout in enumerate(TOWER_LAYOUT) if layout[2] != playerIndex]
+
+    return own + enemy
+
+CARD_INDEX = {cardClass: i for i, cardClass in enumerate(DECK)}
+
+# Fills out (anything indexable with OBSERVATION_SIZE floats, usually a numpy row) with the
+# observation for player in an object based game
+def EncodeObservation(game, player, out) -> None:
+    playerIndex = game.players.index(player)
+
+    out[0:OBSERVATION_SIZE] = [0.0] * OBSERVATION_SIZE
+
+    out[OBS_ELIXIR] = player.elixir / MAX_ELIXIR
+    out[OBS_TIME] = game.lifetime / GAME_LENGTH
+
+    for i in range(HAND_SIZE + 1):
+        out[OBS_CARDS + i] = (CARD_INDEX[type(player.deck[i])] + 1) / len(DECK)
+
+    for i, slot in enumerate(TowerOrder(playerIndex)):
+        tower = game.towers[slot]
+        out[OBS_TOWERS + i] = max(0, tower.health) / tower.maxHealth
+
+    i = OBS_TROOPS
+
+    for troop in game.troops:
+        if i >= OBSERVATION_SIZE: break
+        if troop.dead: continue
+
+        y = troop.y if playerIndex == 0 else ARENA_HEIGHT - troop.y
+
+        out[i] = 1 if troop.owner == player else -1
+        out[i + 1] = troop.troopType.value / MAX_TROOP_TYPE
+        out[i + 2] = troop.x / ARENA_WIDTH
+        out[i + 3] = y / ARENA_HEIGHT
+        out[i + 4] = troop.health / troop.maxHealth
+
+        i += TROOP_FEATURES
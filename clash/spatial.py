@@ -0,0 +1,54 @@
+class SpatialGrid():
+    def __init__(self, cellSize: float = 32):
+        self.cellSize = cellSize
+        self.cells = {}
+
+    def Clear(self) -> None:
+        self.cells.clear()
+
+    def Insert(self, obj) -> None:
+        key = (int(obj.x // self.cellSize), int(obj.y // self.cellSize))
+
+        cell = self.cells.get(key)
+
+        if cell is None:
+            self.cells[key] = [obj]
+        else:
+            cell.append(obj)
+
+    def Rebuild(self, objects) -> None:
+        self.cells.clear()
+
+        size = self.cellSize
+        cells = self.cells
+
+        for obj in objects:
+            if obj.dead: continue
+
+            key = (int(obj.x // size), int(obj.y // size))
+
+            cell = cells.get(key)
+
+            if cell is None:
+                cells[key] = [obj]
+            else:
+                cell.append(obj)
+
+    # Everything in the cells overlapping the square around (x, y), callers still do the exact distance check
+    def Query(self, x, y, radius):
+        size = self.cellSize
+        cells = self.cells
+
+        minX, maxX = int((x - radius) // size), int((x + radius) // size)
+        minY, maxY = int((y - radius) // size), int((y + radius) // size)
+
+        found = []
+
+        for cx in range(minX, maxX + 1):
+            for cy in range(minY, maxY + 1):
+                cell = cells.get((cx, cy))
+
+                if cell:
+                    found.extend(cell)
+
+        return found
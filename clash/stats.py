@@ -0,0 +1,82 @@
+from operator import attrgetter
+
+# Everything about a unit, tower or card that never changes during a game. Each kind gets one
+# shared record, entities point at theirs with .stats and only store what changes as they play.
+
+class UnitStats():
+    __slots__ = ("speed", "maxHealth", "damage", "attackRadius", "attackSpeed", "initialAttackSpeed",
+                 "targetBuildings", "weight", "air", "canHitAir", "projectileSpeed", "splashRadius")
+
+    def __init__(self, speed=10, maxHealth=4090, damage=253, attackRadius=32, attackSpeed=1/1.5,
+                 initialAttackSpeed=1/0.5, targetBuildings=True, weight=1, air=False, canHitAir=False,
+                 projectileSpeed=0, splashRadius=0):
+        self.speed = speed
+        self.maxHealth = maxHealth
+        self.damage = damage
+        self.attackRadius = attackRadius
+
+        # Attacks per second, and how quickly the first one winds up after picking a target
+        self.attackSpeed = attackSpeed
+        self.initialAttackSpeed = initialAttackSpeed
+
+        self.targetBuildings = targetBuildings
+
+        # How much it gets influenced by other troops pushing
+        self.weight = weight
+
+        self.air = air
+        self.canHitAir = canHitAir
+
+        # Only for units that attack with AOE projectiles
+        self.projectileSpeed = projectileSpeed
+        self.splashRadius = splashRadius
+
+class TowerStats():
+    __slots__ = ("maxHealth", "damage", "range", "isKing")
+
+    def __init__(self, maxHealth=2786, damage=99, range=130, isKing=False):
+        self.maxHealth = maxHealth
+        self.damage = damage
+        self.range = range
+        self.isKing = isKing
+
+class CardStats():
+    __slots__ = ("cost",)
+
+    def __init__(self, cost):
+        self.cost = cost
+
+# Keyed by class name
+UNITS = {
+    "Troop": UnitStats(),
+    "Skeleton": UnitStats(speed=22.5, maxHealth=81, damage=81, attackSpeed=1, targetBuildings=False, weight=1),
+    "Knight": UnitStats(speed=15, maxHealth=1766, damage=202, attackSpeed=1.2, targetBuildings=False, weight=20),
+    "Giant": UnitStats(speed=11.125, maxHealth=4090, damage=253, attackSpeed=1/1.5, targetBuildings=True, weight=50),
+    "MiniPekka": UnitStats(speed=22.5, maxHealth=1433, damage=687, attackSpeed=1/1.6, targetBuildings=False, weight=30),
+    "BabyDragon": UnitStats(speed=22.5, maxHealth=1152, damage=161, attackRadius=60, attackSpeed=1/1.5,
+                            initialAttackSpeed=1/0.3, targetBuildings=False, weight=30, air=True, canHitAir=True,
+                            projectileSpeed=100, splashRadius=45),
+
+    # Spells never join the game, damage is what the projectile does on landing
+    "Fireball": UnitStats(damage=688, projectileSpeed=100, splashRadius=60),
+}
+
+TOWERS = {
+    "Princess": TowerStats(),
+    "King": TowerStats(range=200, isKing=True),
+}
+
+# Keyed by cardName
+CARDS = {
+    "KNIGHT": CardStats(3),
+    "GIANT": CardStats(5),
+    "MINI_PEKKA": CardStats(4),
+    "BABY_DRAGON": CardStats(4),
+    "FIREBALL": CardStats(4),
+    "SKELETON": CardStats(1),
+    "SKARMY": CardStats(3),
+}
+
+# Read-only attribute forwarded to the entity's stats record, so troop.speed and the like still work
+def StatProperty(name) -> property:
+    return property(attrgetter("stats." + name))
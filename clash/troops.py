@@ -1,10 +1,27 @@
 from enum import Enum, auto
 from typing import Optional
 import math
-from pygame.math import Vector2
+from clash.vector2 import Vector2
+from clash.navigation import CellIndex
+from clash.occupancy import FREE
+from clash.stats import UNITS, StatProperty
 
 RIVER_Y = 305
 
+# x of the left and right bridge, troops pick the one on the same side as their target
+BRIDGES = (120, 330)
+ARENA_MID_X = 225
+
+# Troops lock onto enemy troops within this radius, otherwise they go for buildings
+AGGRO_RADIUS = 100
+
+# Seconds between full target searches when nothing has invalidated a unit's target. Anything
+# walking into range (rather than spawning there) is picked up at the next one.
+RETARGET_PERIOD = 0.25
+
+SEPARATION_DISTANCE = 30
+SEPARATION_STRENGTH = 40
+
 OBSTACLES = [
     (54, 291, 50, 30), # Left river
     (136, 290, 180, 30), # Middle river
@@ -20,57 +37,88 @@ class TroopType(Enum):
     FIREBALL = auto()
 
 class Troop():
-    def __init__(self, x: int, y: int, t: TroopType, owner):
+    # Only what changes during a game lives on the troop, the rest is in its class's stats record
+    __slots__ = ("x", "y", "headingX", "headingY", "owner", "target", "health", "attackTimer", "initialAttackTimer",
+                 "dead", "retarget", "nextRetarget", "targeters")
+
+    troopType = None
+    stats = UNITS["Troop"]
+
+    speed = StatProperty("speed")
+    maxHealth = StatProperty("maxHealth")
+    damage = StatProperty("damage")
+    attackRadius = StatProperty("attackRadius")
+    attackSpeed = StatProperty("attackSpeed")
+    initialAttackSpeed = StatProperty("initialAttackSpeed")
+    targetBuildings = StatProperty("targetBuildings")
+    weight = StatProperty("weight")
+    air = StatProperty("air")
+    canHitAir = StatProperty("canHitAir")
+    projectileSpeed = StatProperty("projectileSpeed")
+    splashRadius = StatProperty("splashRadius")
+
+    # Heading in degrees, anticlockwise from the right like the GUI wants. Only worked out when asked for
+    @property
+    def direction(self) -> float:
+        return math.degrees(math.atan2(-self.headingY, self.headingX))
+
+    def __init__(self, x: int, y: int, owner):
         self.x = x
         self.y = y
 
-        self.speed = 10
-        self.direction = 90
+        # Unit vector we're walking along, blue starts off up the screen and red down it
+        self.headingX = 0.0
+        self.headingY = -1.0 if owner.isFocused else 1.0
 
         self.owner = owner
 
-        if not owner.isFocused:
-            self.direction += 180
-
-        self.troopType = t
-
         self.target: Optional[Troop] = None
 
-        self.maxHealth = 4090
-        self.health = self.maxHealth
-        
-        self.attackRadius = 32
+        self.health = self.stats.maxHealth
 
-        self.damage = 253
         self.attackTimer = 0
-        self.attackSpeed = 1/1.5 # 
-
         self.initialAttackTimer = 0
-        self.initialAttackSpeed = 1/0.5
 
         self.dead = False
-        self.targetBuildings = True
 
-        # How much it gets influenced by other troops pushing
-        self.weight = 1
+        # Set when the target might no longer be the right one (it died, an enemy spawned nearby or a
+        # tower fell), otherwise targets are only searched for again at nextRetarget
+        self.retarget = True
+        self.nextRetarget = 0
 
-        self.air = False
-        self.canHitAir = False
-
-    def InObstacle(self, xPos, yPos, topleftX, topleftY, w, h):
-        if xPos < topleftX or xPos > topleftX + w:
-            return False
-        if yPos < topleftY or yPos > topleftY + h:
-            return False
-        return True
+        # Troops and towers targeting this one, told to retarget when it dies. Buildings don't keep
+        # a list, Tower.Die tells every enemy troop anyway
+        self.targeters = []
 
     def Tick(self, dt: float) -> None:
         if self.dead: 
             return    
 
+        # Set when a TickProfiler is timing the game, it's told as each phase finishes
+        profiler = self.owner.game.profiler
+
         self.PickTarget()
 
-        self.attackTimer = min(1, self.attackTimer + self.attackSpeed * dt)
+        if profiler: profiler.Lap("targeting")
+
+        moving = self.Engage(dt)
+
+        if profiler: profiler.Lap("attack")
+
+        if moving:
+            separationX, separationY = self.Separation()
+
+            if profiler: profiler.Lap("separation")
+
+            self.Move(dt, separationX, separationY)
+
+            if profiler: profiler.Lap("collision")
+
+    # Turns towards the target and attacks it if it's in range, returns whether we still need to move
+    def Engage(self, dt: float) -> bool:
+        stats = self.stats
+
+        self.attackTimer = min(1, self.attackTimer + stats.attackSpeed * dt)
 
         moving = True
 
@@ -78,96 +126,124 @@ class Troop():
             dx = self.target.x - self.x
             dy = self.target.y - self.y
 
-            # Check if we gotta go accross the bridge
-            if (self.target.y > RIVER_Y and self.y < RIVER_Y) or (self.target.y < RIVER_Y and self.y > RIVER_Y):
-                bridgeX = 120
+            flowFields = self.owner.game.flowFields
+            field = None
+
+            # Buildings don't move, the field to this one knows the whole way there
+            if not isinstance(self.target, Troop):
+                field = flowFields.Tower(self.target.index)
+
+            # Check if we gotta go accross the bridge, the flow field for the target's lane knows the way
+            elif (self.target.y > RIVER_Y and self.y < RIVER_Y) or (self.target.y < RIVER_Y and self.y > RIVER_Y):
+                lane = 1 if self.target.x > ARENA_MID_X else 0
 
-                if self.target.x > 225:
-                    bridgeX = 330
+                field = flowFields.Field(self.y, lane)
 
-                self.direction = math.degrees(math.atan2(-(RIVER_Y - self.y), bridgeX - self.x))
+            if field:
+                cell = CellIndex(self.x, self.y)
+
+                self.headingX = field.headingX[cell]
+                self.headingY = field.headingY[cell]
 
             else:
-                self.direction = math.degrees(math.atan2(-dy, dx))
+                length = math.sqrt(dx*dx + dy*dy)
+
+                if length > 0:
+                    self.headingX = dx / length
+                    self.headingY = dy / length
 
             # In range
-            if dx*dx + dy*dy < self.attackRadius*self.attackRadius:
+            if dx*dx + dy*dy < stats.attackRadius*stats.attackRadius:
                 moving = False
 
-                self.initialAttackTimer = min(1, self.initialAttackTimer + self.initialAttackSpeed * dt)
+                self.initialAttackTimer = min(1, self.initialAttackTimer + stats.initialAttackSpeed * dt)
 
                 if self.attackTimer == 1 and self.initialAttackTimer == 1:
                     self.attackTimer = 0
 
                     self.Attack()
 
-        if moving:
-            # Calculate separation force from nearby troops
-            separationX, separationY = 0, 0
-            nearbyCount = 0
+        return moving
+
+    # Calculate separation force from nearby troops
+    def Separation(self):
+        separationX, separationY = 0, 0
+        nearbyCount = 0
+        
+        # Define minimum desired separation distance
+        minDistance = SEPARATION_DISTANCE
+        weight = self.stats.weight
+
+        for other in self.owner.game.grid.Query(self.x, self.y, minDistance):
+            if other == self or other.dead:
+                continue
+                
+            dx = self.x - other.x
+            dy = self.y - other.y
+            distanceSq = dx*dx + dy*dy
             
-            for other in self.owner.game.troops:
-                if other == self or other.dead:
-                    continue
-                    
-                dx = self.x - other.x
-                dy = self.y - other.y
-                distanceSq = dx*dx + dy*dy
+            if distanceSq < minDistance * minDistance:
+                # Calculate repulsion strength (stronger when closer)
+                distance = math.sqrt(distanceSq)
+                baseStrength = 1.0 - (distance / minDistance)
                 
-                # Define minimum desired separation distance
-                minDistance = 30
+                weightRatio = other.stats.weight / (weight + other.stats.weight)
+                #weightRatio = 1
+                pushStrength = baseStrength * weightRatio
                 
-                if distanceSq < minDistance * minDistance:
-                    # Calculate repulsion strength (stronger when closer)
-                    distance = math.sqrt(distanceSq)
-                    baseStrength = 1.0 - (distance / minDistance)
-                    
-                    weightRatio = other.weight / (self.weight + other.weight)
-                    #weightRatio = 1
-                    pushStrength = baseStrength * weightRatio
-                    
-                    # Normalize the direction vector
-                    if distance > 0:
-                        dx = dx / distance
-                        dy = dy / distance
-                    
-                    separationX += dx * pushStrength
-                    separationY += dy * pushStrength
-                    nearbyCount += 1
-            
-            # Apply separation force if there are nearby troops
-            if nearbyCount > 0:
-                separationStrength = 40
-                separationX = separationX * separationStrength
-                separationY = separationY * separationStrength
-            
-            # Combine movement direction with separation
-            rad = math.radians(self.direction)
-            moveX = (math.cos(rad) * self.speed + separationX) * dt
-            moveY = (-math.sin(rad) * self.speed + separationY) * dt
-
-            x = self.x + moveX
-            y = self.y + moveY
-
-            for o in OBSTACLES:
-                if self.InObstacle(x, y, *o):
-                    moveY = 0
-                    break
-
-            for t in self.owner.game.towers:
-                if self.InObstacle(x, y, t.x - 20, t.y - 20, 40, 40):
-                    moveY = 0
-                    moveX = self.speed*dt
-                    break
+                # Normalize the direction vector
+                if distance > 0:
+                    dx = dx / distance
+                    dy = dy / distance
+                
+                separationX += dx * pushStrength
+                separationY += dy * pushStrength
+                nearbyCount += 1
+        
+        # Apply separation force if there are nearby troops
+        if nearbyCount > 0:
+            separationStrength = SEPARATION_STRENGTH
+            separationX = separationX * separationStrength
+            separationY = separationY * separationStrength
+
+        return separationX, separationY
+
+    # Steps along our heading plus the separation push, sliding along the river and tower boxes
+    def Move(self, dt: float, separationX: float, separationY: float) -> None:
+        # Combine movement direction with separation
+        speed = self.stats.speed
+        moveX = (self.headingX * speed + separationX) * dt
+        moveY = (self.headingY * speed + separationY) * dt
+
+        occupancy = self.owner.game.occupancy
+        x, y = self.x, self.y
+
+        # Keep whichever half of the step is clear. Troops already inside something (spawned or pushed
+        # there) just walk out
+        if occupancy.At(x + moveX, y + moveY) != FREE and occupancy.At(x, y) == FREE:
+            if occupancy.At(x + moveX, y) == FREE:
+                moveY = 0
+            elif occupancy.At(x, y + moveY) == FREE:
+                moveX = 0
+            else:
+                return
 
-            # Apply both forces
-            self.x += moveX
-            self.y += moveY
+        # Apply both forces
+        self.x = x + moveX
+        self.y = y + moveY
 
     def PickTarget(self) -> None:
+        game = self.owner.game
+
         if self.target != None:
             if self.target.dead:
                 self.target = None
+                self.retarget = True
+
+        if not self.retarget and game.lifetime < self.nextRetarget: return
+
+        self.retarget = False
+        self.nextRetarget = game.lifetime + game.retargetPeriod
 
         closest = None
         closestDist = float('inf')
@@ -177,10 +253,14 @@ class Troop():
 
         initialTarget = self.target
 
-        for troop in self.owner.game.troops:
+        radius = AGGRO_RADIUS
+        canHitAir = self.stats.canHitAir
+
+        # Only troops within the acquisition radius can become the target, so just look nearby
+        for troop in game.grid.Query(self.x, self.y, radius):
             if troop.owner == self.owner: continue
             if troop.dead: continue
-            if troop.air and not self.canHitAir: continue
+            if troop.stats.air and not canHitAir: continue
 
             dx = troop.x - self.x
             dy = troop.y - self.y
@@ -192,7 +272,7 @@ class Troop():
                 closestDist = dist
 
         # Also check towers
-        for tower in self.owner.game.towers:
+        for tower in game.towers:
             if tower.owner == self.owner: continue
             if tower.dead: continue
 
@@ -205,17 +285,22 @@ class Troop():
                 closestBuildingDist = dist
                 closestBuilding = tower
 
-        radius = 100
         if closestDist <= radius*radius:
             self.target = closest
 
-        if self.targetBuildings or not self.target:
+        if self.stats.targetBuildings or not self.target:
             self.target = closestBuilding
 
         # Update initialAttack timer if changed target
         if initialTarget != self.target:
             self.initialAttackTimer = 0
 
+            if isinstance(initialTarget, Troop):
+                initialTarget.targeters.remove(self)
+
+            if isinstance(self.target, Troop):
+                self.target.targeters.append(self)
+
     # Returns True if died
     def TakeDamage(self, attacker: Optional["Troop"], damage: float) -> bool:
         self.health -= damage
@@ -227,117 +312,70 @@ class Troop():
         return False
     
     def Die(self) -> None:
-        self.owner.game.KillTroop(self)
+        for targeter in self.targeters:
+            targeter.retarget = True
 
-        self.dead = True
+        # Don't leave a dead troop in the list of whatever we were hitting
+        if isinstance(self.target, Troop) and not self.target.dead:
+            self.target.targeters.remove(self)
+
+        self.owner.game.KillTroop(self)
 
     def Attack(self) -> None:
         if not self.target: return
 
-        self.target.TakeDamage(self, self.damage)
+        self.target.TakeDamage(self, self.stats.damage)
 
 class Skeleton(Troop):
-    def __init__(self, x: int, y: int, owner):
-        super().__init__(x, y, TroopType.SKELETON, owner)
-
-        self.speed = 22.5
-
-        self.maxHealth = 81
-        self.health = self.maxHealth
-        
-        self.damage = 81
-        self.attackTimer = 0
-        self.attackSpeed = 1
-
-        self.targetBuildings = False
+    __slots__ = ()
 
-        self.weight = 1
+    troopType = TroopType.SKELETON
+    stats = UNITS["Skeleton"]
 
 class Knight(Troop):
-    def __init__(self, x: int, y: int, owner):
-        super().__init__(x, y, TroopType.KNIGHT, owner)
-
-        self.speed = 15
+    __slots__ = ()
 
-        self.maxHealth = 1766
-        self.health = self.maxHealth
-        
-        self.damage = 202
-        self.attackTimer = 0
-        self.attackSpeed = 1.2
-
-        self.targetBuildings = False
-
-        self.weight = 20
+    troopType = TroopType.KNIGHT
+    stats = UNITS["Knight"]
 
 class Giant(Troop):
-    def __init__(self, x: int, y: int, owner):
-        super().__init__(x, y, TroopType.GIANT, owner)
+    __slots__ = ()
 
-        self.speed = 11.125
-
-        self.maxHealth = 4090
-        self.health = self.maxHealth
-        
-        self.damage = 253
-        self.attackTimer = 0
-        self.attackSpeed = 1/1.5
-
-        self.targetBuildings = True
-
-        self.weight = 50
+    troopType = TroopType.GIANT
+    stats = UNITS["Giant"]
 
 class MiniPekka(Troop):
-    def __init__(self, x: int, y: int, owner):
-        super().__init__(x, y, TroopType.MINI_PEKKA, owner)
+    __slots__ = ()
 
-        self.speed = 22.5
+    troopType = TroopType.MINI_PEKKA
+    stats = UNITS["MiniPekka"]
 
-        self.maxHealth = 1433
-        self.health = self.maxHealth
-        
-        self.damage = 687
-        self.attackTimer = 0
-        self.attackSpeed = 1/1.6
-
-        self.targetBuildings = False
+class Fireball(Troop):
+    __slots__ = ()
 
-        self.weight = 30
+    troopType = TroopType.FIREBALL
+    stats = UNITS["Fireball"]
 
-class Fireball(Troop):
     def __init__(self, x: int, y: int, owner):
-        super().__init__(x, y, TroopType.FIREBALL, owner)
+        super().__init__(x, y, owner)
 
+        stats = self.stats
         kingTower = self.owner.kingTower
 
         dx, dy = x - kingTower.x, y - kingTower.y
-        self.owner.game.SpawnAOEProjectile(kingTower.x, kingTower.y, owner, Vector2(dx, dy).normalize(), 100, 688, Vector2(x, y), 60) 
+        self.owner.game.SpawnAOEProjectile(kingTower.x, kingTower.y, owner, Vector2(dx, dy).normalize(), stats.projectileSpeed, stats.damage, Vector2(x, y), stats.splashRadius) 
 
 class BabyDragon(Troop):
-    def __init__(self, x: int, y: int, owner):
-        super().__init__(x, y, TroopType.BABY_DRAGON, owner)
-
-        self.speed = 22.5
+    __slots__ = ()
 
-        self.maxHealth = 1152
-        self.health = self.maxHealth
-        
-        self.damage = 161
-        self.attackRadius = 60
-        self.attackTimer = 0
-        self.attackSpeed = 1/1.5
-        self.initialAttackSpeed = 1/0.3
-
-        self.targetBuildings = False
-
-        self.weight = 30
-
-        self.air = True
-        self.canHitAir = True
+    troopType = TroopType.BABY_DRAGON
+    stats = UNITS["BabyDragon"]
 
     def Attack(self) -> None:
         if not self.target: return
 
         dx, dy = self.target.x - self.x, self.target.y - self.y
 
-        self.owner.game.SpawnAOEProjectile(self.x, self.y, self, Vector2(dx, dy).normalize(), 100, self.damage, Vector2(self.target.x, self.target.y), 45) #x, y, owner, dir, speed, damage, targetPos, radius
\ No newline at end of file
+        stats = self.stats
+
+        self.owner.game.SpawnAOEProjectile(self.x, self.y, self, Vector2(dx, dy).normalize(), stats.projectileSpeed, stats.damage, Vector2(self.target.x, self.target.y), stats.splashRadius) #x, y, owner, dir, speed, damage, targetPos, radius
\ No newline at end of file
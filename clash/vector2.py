@@ -0,0 +1,45 @@
+import math
+
+# Just enough of pygame.math.Vector2 for the simulation, so headless games never import pygame
+class Vector2():
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+    def __getitem__(self, i):
+        return (self.x, self.y)[i]
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __len__(self):
+        return 2
+
+    def __repr__(self):
+        return f"Vector2({self.x}, {self.y})"
+
+    # sqrt rather than hypot everywhere so results match pygame to the last bit
+    def length(self) -> float:
+        return math.sqrt(self.x * self.x + self.y * self.y)
+
+    def normalize(self) -> "Vector2":
+        length = self.length()
+
+        if length == 0:
+            raise ValueError("Can't normalize Vector of length Zero")
+
+        return Vector2(self.x / length, self.y / length)
+
+    # Takes anything with two items, like pygame's
+    def distance_to(self, other) -> float:
+        dx = self.x - other[0]
+        dy = self.y - other[1]
+
+        return math.sqrt(dx * dx + dy * dy)
+
+    # (length, angle in degrees)
+    def as_polar(self):
+        return self.length(), math.degrees(math.atan2(self.y, self.x))
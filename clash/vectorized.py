@@ -0,0 +1,802 @@
+from typing import List, Optional
+from clash.troops import *
+from clash.cards import *
+from clash.game import *
+from clash.navigation import CELL_SIZE, COLS, ROWS, GetFlowFields
+from clash.stats import TOWERS
+from clash.occupancy import ARENA_WIDTH, ARENA_HEIGHT, FREE, RIVER, TOWER, GetTemplate
+import numpy as np
+import math
+
+# Structure-of-arrays simulation. Every array is shaped (games, slots) so the same kernel
+# steps one game (VectorizedGame) or many in lockstep. Slots 0-5 are always the towers in
+# TOWER_LAYOUT order, troops fill the rest.
+
+NUM_TOWERS = len(TOWER_LAYOUT)
+KING_SLOTS = [i for i, (x, y, player, isKing) in enumerate(TOWER_LAYOUT) if isKing]
+
+UNIT_CLASSES = [Skeleton, Knight, Giant, MiniPekka, BabyDragon]
+
+_OCCUPANCY_MAP = None
+
+# The object engine's occupancy template as a (y, x) array. Games share it, a destroyed tower's
+# footprint is ignored by checking the tower is alive instead of clearing it
+def _OccupancyMap():
+    global _OCCUPANCY_MAP
+
+    if _OCCUPANCY_MAP is None:
+        template = GetTemplate(OBSTACLES, TOWER_BOXES)
+        _OCCUPANCY_MAP = np.frombuffer(template, np.uint8).reshape(ARENA_HEIGHT, ARENA_WIDTH)
+
+    return _OCCUPANCY_MAP
+
+# Bridge fields come first in a FlowFields, then one per tower
+BRIDGE_FIELDS = 2 * len(BRIDGES)
+
+# The object engine's flow fields as (row, cell) arrays of headingX and headingY so every troop's
+# heading is a single gather. A row is added the first time a (fallen towers, field) pair comes
+# up, _FIELD_ROWS[fallen tower bitmask, field] is its row or -1.
+_FIELD_ROWS = np.full((1 << NUM_TOWERS, BRIDGE_FIELDS + NUM_TOWERS), -1, np.intp)
+_FIELD_HEADINGS = (np.zeros((0, COLS * ROWS)), np.zeros((0, COLS * ROWS)))
+
+def _FieldRows(fallen, fields):
+    global _FIELD_HEADINGS
+
+    rows = _FIELD_ROWS[fallen, fields]
+    missing = rows < 0
+
+    if missing.any():
+        headingX, headingY = _FIELD_HEADINGS
+        added = []
+
+        for mask, index in sorted(set(zip(fallen[missing].tolist(), fields[missing].tolist()))):
+            flowFields = GetFlowFields(RIVER_Y, BRIDGES, OBSTACLES, TOWER_BOXES, {i for i in range(NUM_TOWERS) if mask >> i & 1})
+            field = flowFields.BridgeField(index) if index < BRIDGE_FIELDS else flowFields.Tower(index - BRIDGE_FIELDS)
+
+            _FIELD_ROWS[mask, index] = len(headingX) + len(added)
+            added.append(field)
+
+        _FIELD_HEADINGS = (np.vstack([headingX] + [field.headingX for field in added]),
+                           np.vstack([headingY] + [field.headingY for field in added]))
+
+        rows = _FIELD_ROWS[fallen, fields]
+
+    return rows
+
+# Whether troops in games stepping to (px, py) run into the river or a standing tower, one gather
+# into the static occupancy map
+def _Blocked(towerAlive, games, px, py):
+    inside = (px >= 0) & (px < ARENA_WIDTH) & (py >= 0) & (py < ARENA_HEIGHT)
+    cellX = np.where(inside, px, 0).astype(np.intp)
+    cellY = np.where(inside, py, 0).astype(np.intp)
+    blocker = np.where(inside, _OccupancyMap()[cellY, cellX], FREE)
+
+    # Tower footprints only count while the tower stands
+    towerIndex = np.clip(blocker.astype(np.intp) - TOWER, 0, NUM_TOWERS - 1)
+
+    return (blocker == RIVER) | ((blocker >= TOWER) & towerAlive[games, towerIndex])
+
+# Columns filled in from each unit's stats record, so clash.stats stays the source of truth
+def _BuildStatTable():
+    size = max(t.value for t in TroopType) + 1
+
+    table = {
+        "speed": np.zeros(size),
+        "maxHealth": np.zeros(size),
+        "damage": np.zeros(size),
+        "attackRadius": np.zeros(size),
+        "attackSpeed": np.zeros(size),
+        "initialAttackSpeed": np.zeros(size),
+        "weight": np.zeros(size),
+        "splash": np.zeros(size),
+        "projectileSpeed": np.zeros(size),
+        "air": np.zeros(size, np.bool_),
+        "canHitAir": np.zeros(size, np.bool_),
+        "targetBuildings": np.zeros(size, np.bool_),
+    }
+
+    # Column name -> stat, when they differ
+    renamed = {"splash": "splashRadius"}
+
+    for troopClass in UNIT_CLASSES:
+        i = troopClass.troopType.value
+
+        for name in table:
+            table[name][i] = getattr(troopClass.stats, renamed.get(name, name))
+
+    return table
+
+UNIT_STATS = _BuildStatTable()
+UNIT_TYPE_BY_CLASS = {troopClass: troopClass.troopType for troopClass in UNIT_CLASSES}
+
+ENTITY_FIELDS = [
+    ("alive", np.bool_, False),
+    ("tower", np.bool_, False),
+    ("unitType", np.int16, 0),
+    ("side", np.int8, 0),
+    ("x", np.float64, 0),
+    ("y", np.float64, 0),
+    ("health", np.float64, 0),
+    ("maxHealth", np.float64, 1),
+    ("speed", np.float64, 0),
+    ("weight", np.float64, 1),
+    ("damage", np.float64, 0),
+    ("attackRadius", np.float64, 0),
+    ("attackSpeed", np.float64, 0),
+    ("attackTimer", np.float64, 0),
+    ("initialAttackSpeed", np.float64, 0),
+    ("initialAttackTimer", np.float64, 0),
+    ("splash", np.float64, 0),
+    ("projectileSpeed", np.float64, 0),
+    ("air", np.bool_, False),
+    ("canHitAir", np.bool_, False),
+    ("targetBuildings", np.bool_, False),
+    ("range", np.float64, 0),
+    ("active", np.bool_, False),
+    ("king", np.bool_, False),
+    ("target", np.int32, -1),
+    # Unit vector the troop walks along
+    ("headingX", np.float64, 0),
+    ("headingY", np.float64, -1),
+]
+
+PROJECTILE_FIELDS = [
+    ("alive", np.bool_, False),
+    ("side", np.int8, 0),
+    ("x", np.float64, 0),
+    ("y", np.float64, 0),
+    ("dirX", np.float64, 0),
+    ("dirY", np.float64, 0),
+    ("speed", np.float64, 0),
+    ("damage", np.float64, 0),
+    # Entity slot for single target shots, -1 for AOE
+    ("target", np.int32, -1),
+    ("targetX", np.float64, 0),
+    ("targetY", np.float64, 0),
+    # 0 for single target shots
+    ("radius", np.float64, 0),
+    # Seconds in the air, dropped once past maxAge (see PROJECTILE_LIFETIME_MARGIN)
+    ("age", np.float64, 0),
+    ("maxAge", np.float64, 0),
+]
+
+class EntityArrays():
+    def __init__(self, fields, games, capacity):
+        self.fields = fields
+        self.capacity = capacity
+
+        for name, dtype, fill in fields:
+            setattr(self, name, np.full((games, capacity), fill, dtype))
+
+    def Grow(self, capacity) -> None:
+        games = self.alive.shape[0]
+
+        for name, dtype, fill in self.fields:
+            old = getattr(self, name)
+            new = np.full((games, capacity), fill, dtype)
+            new[:, :self.capacity] = old
+
+            setattr(self, name, new)
+
+        self.capacity = capacity
+
+    def ClearRows(self, rows) -> None:
+        for name, dtype, fill in self.fields:
+            getattr(self, name)[rows] = fill
+
+# Position of each item within its group, e.g. [3, 3, 1, 3] -> [0, 1, 0, 2]
+def _RankWithinGroup(groups):
+    if len(groups) == 0:
+        return np.zeros(0, np.int64)
+
+    order = np.argsort(groups, kind="stable")
+    sortedGroups = groups[order]
+
+    starts = np.flatnonzero(np.r_[True, sortedGroups[1:] != sortedGroups[:-1]])
+    counts = np.diff(np.r_[starts, len(groups)])
+
+    ranks = np.empty(len(groups), np.int64)
+    ranks[order] = np.arange(len(groups)) - np.repeat(starts, counts)
+
+    return ranks
+
+# Finds a free slot for each (row, rank) pair, growing the arrays if any row is full
+def _AllocateSlots(arrays, rows, reserved=0):
+    ranks = _RankWithinGroup(rows)
+
+    while True:
+        occupied = arrays.alive.copy()
+        occupied[:, :reserved] = True
+
+        freeCount = (~occupied).sum(axis=1)
+
+        if len(rows) == 0 or np.all(ranks < freeCount[rows]):
+            break
+
+        arrays.Grow(arrays.capacity * 2)
+
+    # Free slots first, lowest index first
+    freeOrder = np.argsort(occupied, axis=1, kind="stable")
+
+    return freeOrder[rows, ranks]
+
+class SimState():
+    def __init__(self, games: int, capacity: int = 64, projectileCapacity: int = 32):
+        self.games = games
+
+        self.entities = EntityArrays(ENTITY_FIELDS, games, capacity)
+        self.projectiles = EntityArrays(PROJECTILE_FIELDS, games, projectileCapacity)
+
+        # Column of game indices for gathering one slot per game, x[rowIndex, slots]
+        self.rowIndex = np.arange(games)[:, None]
+
+        # Highest slot in use + 1 across all games, kernels only look at [:, :used]. Always
+        # covers at least one troop slot so the troop blocks are never empty
+        self.used = NUM_TOWERS + 1
+        self.projectilesUsed = 0
+
+    def ResetRows(self, rows) -> None:
+        e = self.entities
+
+        e.ClearRows(rows)
+        self.projectiles.ClearRows(rows)
+
+        for i, (x, y, player, isKing) in enumerate(TOWER_LAYOUT):
+            stats = TOWERS["King" if isKing else "Princess"]
+
+            e.alive[rows, i] = True
+            e.tower[rows, i] = True
+            e.side[rows, i] = player
+            e.x[rows, i] = x
+            e.y[rows, i] = y
+            e.health[rows, i] = stats.maxHealth
+            e.maxHealth[rows, i] = stats.maxHealth
+            e.damage[rows, i] = stats.damage
+            e.attackSpeed[rows, i] = PRINCESS_FIRE_RATE
+            e.range[rows, i] = stats.range
+            e.active[rows, i] = not isKing
+            e.king[rows, i] = isKing
+            e.weight[rows, i] = 1
+
+    def SpawnUnits(self, rows, unitTypes, sides, xs, ys):
+        rows = np.asarray(rows, np.int64)
+        unitTypes = np.asarray(unitTypes, np.int64)
+        sides = np.asarray(sides)
+
+        slots = _AllocateSlots(self.entities, rows, NUM_TOWERS)
+        e = self.entities
+
+        e.alive[rows, slots] = True
+        e.tower[rows, slots] = False
+        e.unitType[rows, slots] = unitTypes
+        e.side[rows, slots] = sides
+        e.x[rows, slots] = xs
+        e.y[rows, slots] = ys
+        e.target[rows, slots] = -1
+        e.attackTimer[rows, slots] = 0
+        e.initialAttackTimer[rows, slots] = 0
+
+        # Blue walks up the screen, red walks down
+        e.headingX[rows, slots] = 0
+        e.headingY[rows, slots] = np.where(sides == 0, -1, 1)
+
+        for name in UNIT_STATS:
+            getattr(e, name)[rows, slots] = UNIT_STATS[name][unitTypes]
+
+        e.health[rows, slots] = UNIT_STATS["maxHealth"][unitTypes]
+
+        if len(slots):
+            self.used = max(self.used, int(slots.max()) + 1)
+
+        return slots
+
+    def SpawnProjectiles(self, rows, sides, xs, ys, dirXs, dirYs, speeds, damages, targets, targetXs, targetYs, radii):
+        rows = np.asarray(rows, np.int64)
+
+        slots = _AllocateSlots(self.projectiles, rows)
+        p = self.projectiles
+
+        p.alive[rows, slots] = True
+        p.side[rows, slots] = sides
+        p.x[rows, slots] = xs
+        p.y[rows, slots] = ys
+        p.dirX[rows, slots] = dirXs
+        p.dirY[rows, slots] = dirYs
+        p.speed[rows, slots] = speeds
+        p.damage[rows, slots] = damages
+        p.target[rows, slots] = targets
+        p.targetX[rows, slots] = targetXs
+        p.targetY[rows, slots] = targetYs
+        p.radius[rows, slots] = radii
+        p.age[rows, slots] = 0
+
+        # Single target shots are timed from where their target is now, AOE from where they land
+        targets = np.broadcast_to(targets, rows.shape)
+        single = targets >= 0
+        safeTarget = np.where(single, targets, 0)
+
+        aimX = np.where(single, self.entities.x[rows, safeTarget], targetXs)
+        aimY = np.where(single, self.entities.y[rows, safeTarget], targetYs)
+
+        p.maxAge[rows, slots] = PROJECTILE_LIFETIME_MARGIN + np.hypot(aimX - xs, aimY - ys) / speeds
+
+        if len(slots):
+            self.projectilesUsed = max(self.projectilesUsed, int(slots.max()) + 1)
+
+        return slots
+
+    # Fireballs come out of the owner's king tower
+    def SpawnSpells(self, rows, sides, xs, ys):
+        rows = np.asarray(rows, np.int64)
+        sides = np.asarray(sides, np.int64)
+
+        kings = np.asarray(KING_SLOTS)[sides]
+        fromX, fromY = self.entities.x[rows, kings], self.entities.y[rows, kings]
+
+        dx, dy = xs - fromX, ys - fromY
+        length = np.maximum(np.sqrt(dx*dx + dy*dy), 1e-9)
+
+        count = len(rows)
+
+        return self.SpawnProjectiles(rows, sides, fromX, fromY, dx / length, dy / length,
+                                     np.full(count, Fireball.stats.projectileSpeed), np.full(count, Fireball.stats.damage),
+                                     np.full(count, -1), xs, ys, np.full(count, Fireball.stats.splashRadius))
+
+    def Step(self, dt: float):
+        return StepState(self, dt)
+
+# Advances every game in the state by dt. Returns a (games, 2) array that is True where
+# that side's king tower was destroyed this tick.
+def StepState(state: SimState, dt: float):
+    n = state.used
+    e = state.entities
+    rows = state.rowIndex
+
+    # Views so everything below only touches slots in use, writes go straight back into the state
+    alive = e.alive[:, :n]
+    side = e.side[:, :n]
+    x = e.x[:, :n]
+    y = e.y[:, :n]
+    speed = e.speed[:, :n]
+    weight = e.weight[:, :n]
+    target = e.target[:, :n]
+    attackTimer = e.attackTimer[:, :n]
+    initialAttackTimer = e.initialAttackTimer[:, :n]
+    headingX = e.headingX[:, :n]
+    headingY = e.headingY[:, :n]
+
+    troop = alive & ~e.tower[:, :n]
+    liveTower = alive & e.tower[:, :n]
+    shooter = liveTower & e.active[:, :n]
+
+    # Towers always sit in the first slots, so troop/troop and troop/tower pairs are separate blocks.
+    # [game, i, j] is from troop i to troop j (or tower j)
+    T = NUM_TOWERS
+    troopX, troopY = x[:, T:], y[:, T:]
+    troopAlive = troop[:, T:]
+
+    dx = troopX[:, None, :] - troopX[:, :, None]
+    dy = troopY[:, None, :] - troopY[:, :, None]
+    distSq = dx*dx + dy*dy
+    enemy = side[:, T:, None] != side[:, None, T:]
+
+    towerDx = x[:, None, :T] - troopX[:, :, None]
+    towerDy = y[:, None, :T] - troopY[:, :, None]
+    towerDistSq = towerDx*towerDx + towerDy*towerDy
+    towerEnemy = side[:, T:, None] != side[:, None, :T]
+
+    # Troops: closest enemy troop within aggro range, otherwise (or if they only hit buildings) the closest tower
+    hittable = troopAlive & ~e.air[:, T:n]
+    hittable = enemy & (hittable[:, None, :] | (troopAlive & e.air[:, T:n])[:, None, :] & e.canHitAir[:, T:n, None])
+
+    troopDist = np.where(hittable, distSq, np.inf)
+    closest = troopDist.argmin(axis=2) + T
+
+    buildingDist = np.where(towerEnemy & liveTower[:, None, :T], towerDistSq, np.inf)
+    closestBuilding = np.where(np.isfinite(buildingDist.min(axis=2)), buildingDist.argmin(axis=2), -1)
+
+    troopTarget = target[:, T:]
+    newTarget = np.where(troopDist.min(axis=2) <= AGGRO_RADIUS*AGGRO_RADIUS, closest, troopTarget)
+    newTarget = np.where(e.targetBuildings[:, T:n] | (newTarget < 0), closestBuilding, newTarget)
+    newTarget = np.where(troopAlive, newTarget, troopTarget)
+
+    np.copyto(initialAttackTimer[:, T:], 0, where=troopAlive & (newTarget != troopTarget))
+    troopTarget[...] = newTarget
+
+    # Towers: lock onto the closest enemy troop in range and keep it until it dies
+    inTowerRange = towerEnemy & troopAlive[:, :, None] & (towerDistSq <= (e.range[:, :T] ** 2)[:, None, :])
+    rangeDist = np.where(inTowerRange, towerDistSq, np.inf)
+    towerPick = np.where(np.isfinite(rangeDist.min(axis=1)), rangeDist.argmin(axis=1) + T, -1)
+
+    towerTarget = target[:, :T]
+    np.copyto(towerTarget, towerPick, where=shooter[:, :T] & (towerTarget < 0))
+
+    np.copyto(attackTimer, np.minimum(1, attackTimer + e.attackSpeed[:, :n] * dt), where=troop | shooter)
+
+    hasTarget = target >= 0
+    safeTarget = np.maximum(target, 0)
+    tx = x[rows, safeTarget]
+    ty = y[rows, safeTarget]
+    toX, toY = tx - x, ty - y
+    targetDistSq = toX*toX + toY*toY
+
+    # Buildings and troops over the river are reached by following a flow field, anything else by
+    # heading straight for it
+    steering = troop & hasTarget
+    crossing = (ty > RIVER_Y) != (y > RIVER_Y)
+    crossing &= (ty != RIVER_Y) & (y != RIVER_Y)
+
+    building = steering & (target < T)
+    following = building | (steering & crossing)
+
+    fieldGame, fieldSlot = np.nonzero(following)
+
+    if len(fieldGame):
+        fx, fy = x[fieldGame, fieldSlot], y[fieldGame, fieldSlot]
+        towerTarget = target[fieldGame, fieldSlot]
+
+        bridgeField = np.where(fy > RIVER_Y, 0, len(BRIDGES)) + (tx[fieldGame, fieldSlot] > ARENA_MID_X)
+        fieldIndex = np.where(building[fieldGame, fieldSlot], BRIDGE_FIELDS + towerTarget, bridgeField)
+
+        fallen = (~e.alive[:, :T]) @ (1 << np.arange(T))
+        fieldRow = _FieldRows(fallen[fieldGame], fieldIndex)
+
+        cell = (np.clip(fy // CELL_SIZE, 0, ROWS - 1) * COLS + np.clip(fx // CELL_SIZE, 0, COLS - 1)).astype(np.intp)
+
+        fieldX, fieldY = _FIELD_HEADINGS
+        headingX[fieldGame, fieldSlot] = fieldX[fieldRow, cell]
+        headingY[fieldGame, fieldSlot] = fieldY[fieldRow, cell]
+
+    targetDist = np.sqrt(targetDistSq)
+    straight = steering & ~following & (targetDist > 0)
+    np.divide(toX, targetDist, out=headingX, where=straight)
+    np.divide(toY, targetDist, out=headingY, where=straight)
+
+    inRange = steering & (targetDistSq < e.attackRadius[:, :n] ** 2)
+    np.copyto(initialAttackTimer, np.minimum(1, initialAttackTimer + e.initialAttackSpeed[:, :n] * dt), where=inRange)
+
+    attacking = inRange & (attackTimer == 1) & (initialAttackTimer == 1)
+    firing = shooter & hasTarget & (attackTimer == 1)
+    np.copyto(attackTimer, 0, where=attacking | firing)
+
+    splash = e.splash[:, :n]
+
+    # Melee hits land straight away
+    meleeGame, meleeSlot = np.nonzero(attacking & (splash == 0))
+    np.add.at(e.health, (meleeGame, target[meleeGame, meleeSlot]), -e.damage[meleeGame, meleeSlot])
+
+    splashGame, splashSlot = np.nonzero(attacking & (splash > 0))
+    fireGame, fireSlot = np.nonzero(firing)
+
+    # Movement with separation from nearby troops
+    moving = troop & ~inRange
+
+    # Only a few pairs are ever close, so work on the list of pairs rather than the whole matrix.
+    # Troops sitting exactly on top of each other don't push, same as the object version
+    near = troopAlive[:, :, None] & troopAlive[:, None, :] & (distSq < SEPARATION_DISTANCE*SEPARATION_DISTANCE) & (distSq > 0)
+    nearGame, i, j = np.nonzero(near)
+
+    troopWeight = weight[:, T:]
+    push = (1 / np.sqrt(distSq[nearGame, i, j]) - 1 / SEPARATION_DISTANCE) * SEPARATION_STRENGTH
+    push *= troopWeight[nearGame, j] / (troopWeight[nearGame, i] + troopWeight[nearGame, j])
+
+    pairIndex = nearGame * (n - T) + i
+    separationX = np.zeros_like(x)
+    separationY = np.zeros_like(y)
+    separationX[:, T:] = -np.bincount(pairIndex, push * dx[nearGame, i, j], minlength=state.games * (n - T)).reshape(-1, n - T)
+    separationY[:, T:] = -np.bincount(pairIndex, push * dy[nearGame, i, j], minlength=state.games * (n - T)).reshape(-1, n - T)
+
+    moveX = (headingX * speed + separationX) * dt
+    moveY = (headingY * speed + separationY) * dt
+
+    # Keep whichever half of the step is clear, troops already inside something just walk out
+    moveGame, moveSlot = np.nonzero(moving)
+    towerAlive = e.alive[:, :T]
+
+    px, py = x[moveGame, moveSlot], y[moveGame, moveSlot]
+    mx, my = moveX[moveGame, moveSlot], moveY[moveGame, moveSlot]
+
+    blocked = _Blocked(towerAlive, moveGame, px + mx, py + my) & ~_Blocked(towerAlive, moveGame, px, py)
+
+    if blocked.any():
+        blockedGame, blockedSlot = moveGame[blocked], moveSlot[blocked]
+        px, py, mx, my = px[blocked], py[blocked], mx[blocked], my[blocked]
+
+        slideX = ~_Blocked(towerAlive, blockedGame, px + mx, py)
+        slideY = ~slideX & ~_Blocked(towerAlive, blockedGame, px, py + my)
+        stuck = ~slideX & ~slideY
+
+        moveY[blockedGame[slideX], blockedSlot[slideX]] = 0
+        moveX[blockedGame[slideY], blockedSlot[slideY]] = 0
+        moving[blockedGame[stuck], blockedSlot[stuck]] = False
+
+    np.add(x, moveX, out=x, where=moving)
+    np.add(y, moveY, out=y, where=moving)
+
+    _StepProjectiles(state, dt)
+
+    # New shots start moving next tick
+    if len(splashGame):
+        length = np.maximum(np.sqrt(targetDistSq[splashGame, splashSlot]), 1e-9)
+
+        state.SpawnProjectiles(splashGame, side[splashGame, splashSlot], x[splashGame, splashSlot], y[splashGame, splashSlot],
+                               toX[splashGame, splashSlot] / length, toY[splashGame, splashSlot] / length,
+                               e.projectileSpeed[splashGame, splashSlot], e.damage[splashGame, splashSlot],
+                               -1, tx[splashGame, splashSlot], ty[splashGame, splashSlot], splash[splashGame, splashSlot])
+
+    if len(fireGame):
+        length = np.maximum(np.sqrt(targetDistSq[fireGame, fireSlot]), 1e-9)
+
+        state.SpawnProjectiles(fireGame, side[fireGame, fireSlot], x[fireGame, fireSlot], y[fireGame, fireSlot],
+                               toX[fireGame, fireSlot] / length, toY[fireGame, fireSlot] / length,
+                               TOWER_PROJECTILE_SPEED, e.damage[fireGame, fireSlot],
+                               target[fireGame, fireSlot], 0, 0, 0)
+
+    # Deaths, the arrays may have grown above so go through the state again
+    alive = e.alive[:, :n]
+    died = alive & (e.health[:, :n] <= 0)
+    alive &= ~died
+
+    towerDied = died[:, :NUM_TOWERS]
+    kingDied = towerDied[:, KING_SLOTS]
+
+    # Losing any tower wakes up that side's king
+    if towerDied.any():
+        for player, king in enumerate(KING_SLOTS):
+            sideTowers = [i for i, layout in enumerate(TOWER_LAYOUT) if layout[2] == player]
+            e.active[:, king] |= towerDied[:, sideTowers].any(axis=1)
+
+    if died.any():
+        _ForgetDead(state)
+
+    return kingDied
+
+# Drops every reference to a dead entity so its slot can be reused straight away
+def _ForgetDead(state: SimState) -> None:
+    n = state.used
+    m = state.projectilesUsed
+    e = state.entities
+    p = state.projectiles
+    rows = state.rowIndex
+
+    alive = e.alive[:, :n]
+
+    target = e.target[:, :n]
+    target[~alive[rows, np.clip(target, 0, n - 1)]] = -1
+
+    # Single target projectiles fizzle out when their target is gone
+    projectileTarget = p.target[:, :m]
+    single = p.alive[:, :m] & (projectileTarget >= 0)
+    p.alive[:, :m] &= ~(single & ~alive[rows, np.clip(projectileTarget, 0, n - 1)])
+
+    occupied = np.flatnonzero(e.alive.any(axis=0))
+    state.used = max(NUM_TOWERS + 1, int(occupied[-1]) + 1 if len(occupied) else 0)
+
+def _StepProjectiles(state: SimState, dt: float) -> None:
+    m = state.projectilesUsed
+
+    if m == 0:
+        return
+
+    n = state.used
+    e = state.entities
+    p = state.projectiles
+    rows = state.rowIndex
+
+    alive = p.alive[:, :m]
+    px = p.x[:, :m]
+    py = p.y[:, :m]
+    dirX = p.dirX[:, :m]
+    dirY = p.dirY[:, :m]
+
+    target = p.target[:, :m]
+    damage = p.damage[:, :m]
+    radius = p.radius[:, :m]
+
+    # Single target shots home in on where their target is now
+    single = alive & (target >= 0)
+    safeTarget = np.clip(target, 0, n - 1)
+    targetAlive = e.alive[rows, safeTarget] & single
+
+    hx = e.x[rows, safeTarget] - px
+    hy = e.y[rows, safeTarget] - py
+    length = np.sqrt(hx*hx + hy*hy)
+
+    homing = targetAlive & (length > 0)
+    np.divide(hx, length, out=dirX, where=homing)
+    np.divide(hy, length, out=dirY, where=homing)
+
+    np.add(px, dirX * (p.speed[:, :m] * dt), out=px, where=alive)
+    np.add(py, dirY * (p.speed[:, :m] * dt), out=py, where=alive)
+
+    age = p.age[:, :m]
+    np.add(age, dt, out=age, where=alive)
+
+    # Anything that flew off the arena or for too long is gone before it can hit
+    minX, minY, maxX, maxY = ARENA_BOUNDS
+    culled = alive & ((age > p.maxAge[:, :m]) | (px < minX) | (px > maxX) | (py < minY) | (py > maxY))
+    alive &= ~culled
+
+    targetAlive &= alive
+
+    # Single target shots hit once they reach their target
+    hx = e.x[rows, safeTarget] - px
+    hy = e.y[rows, safeTarget] - py
+
+    hit = targetAlive & (hx*hx + hy*hy <= PROJECTILE_HIT_RADIUS*PROJECTILE_HIT_RADIUS)
+
+    hitGame, hitSlot = np.nonzero(hit)
+    np.add.at(e.health, (hitGame, target[hitGame, hitSlot]), -damage[hitGame, hitSlot])
+
+    # Splash damage to every enemy in the radius once it arrives
+    ax = p.targetX[:, :m] - px
+    ay = p.targetY[:, :m] - py
+
+    explode = alive & (radius > 0) & (ax*ax + ay*ay <= AOE_TRIGGER_DISTANCE*AOE_TRIGGER_DISTANCE)
+    explodeGame, explodeSlot = np.nonzero(explode)
+
+    if len(explodeGame):
+        cx = p.targetX[explodeGame, explodeSlot][:, None]
+        cy = p.targetY[explodeGame, explodeSlot][:, None]
+        r = radius[explodeGame, explodeSlot][:, None]
+
+        ex = e.x[explodeGame, :n] - cx
+        ey = e.y[explodeGame, :n] - cy
+
+        caught = e.alive[explodeGame, :n] & (e.side[explodeGame, :n] != p.side[explodeGame, explodeSlot][:, None]) & (ex*ex + ey*ey <= r*r)
+        caughtRow, caughtSlot = np.nonzero(caught)
+
+        np.add.at(e.health, (explodeGame[caughtRow], caughtSlot), -damage[explodeGame, explodeSlot][caughtRow])
+
+    alive &= ~(hit | explode)
+
+    occupied = np.flatnonzero(p.alive.any(axis=0))
+    state.projectilesUsed = int(occupied[-1]) + 1 if len(occupied) else 0
+
+# Read-only views so the GUI and agents can treat the arrays like the usual objects
+class TroopView():
+    def __init__(self, game, slot):
+        self.game = game
+        self.slot = slot
+        self.owner = game.players[game.state.entities.side[0, slot]]
+        self.troopType = TroopType(int(game.state.entities.unitType[0, slot]))
+
+    def _Get(self, name):
+        return getattr(self.game.state.entities, name)[0, self.slot]
+
+    @property
+    def dead(self) -> bool:
+        return self.game.troopViews.get(self.slot) is not self or not self._Get("alive")
+
+    x = property(lambda self: float(self._Get("x")))
+    y = property(lambda self: float(self._Get("y")))
+    health = property(lambda self: float(self._Get("health")))
+    maxHealth = property(lambda self: float(self._Get("maxHealth")))
+    headingX = property(lambda self: float(self._Get("headingX")))
+    headingY = property(lambda self: float(self._Get("headingY")))
+    direction = property(lambda self: math.degrees(math.atan2(-self.headingY, self.headingX)))
+    air = property(lambda self: bool(self._Get("air")))
+    speed = property(lambda self: float(self._Get("speed")))
+
+class TowerView():
+    def __init__(self, game, slot):
+        self.game = game
+        self.slot = slot
+        self.owner = game.players[TOWER_LAYOUT[slot][2]]
+        self.isKing = TOWER_LAYOUT[slot][3]
+
+    def _Get(self, name):
+        return getattr(self.game.state.entities, name)[0, self.slot]
+
+    x = property(lambda self: float(self._Get("x")))
+    y = property(lambda self: float(self._Get("y")))
+    health = property(lambda self: float(self._Get("health")))
+    maxHealth = property(lambda self: float(self._Get("maxHealth")))
+    range = property(lambda self: float(self._Get("range")))
+    active = property(lambda self: bool(self._Get("active")))
+    dead = property(lambda self: not self._Get("alive"))
+
+class ProjectileView():
+    def __init__(self, game, slot):
+        p = game.state.projectiles
+
+        self.x = float(p.x[0, slot])
+        self.y = float(p.y[0, slot])
+        self.dirX = float(p.dirX[0, slot])
+        self.dirY = float(p.dirY[0, slot])
+        self.speed = float(p.speed[0, slot])
+        self.damage = float(p.damage[0, slot])
+
+class AOEProjectileView(ProjectileView):
+    def __init__(self, game, slot):
+        super().__init__(game, slot)
+
+        p = game.state.projectiles
+
+        self.targetX = float(p.targetX[0, slot])
+        self.targetY = float(p.targetY[0, slot])
+        self.radius = float(p.radius[0, slot])
+
+# Drop-in replacement for Game backed by SimState, agents and the GUI observer work unchanged
+class VectorizedGame(BaseGame):
+    def __init__(self, blueClass, redClass, verbose=True, seed=None, decisionInterval=None):
+        self.verbose = verbose
+
+        self.rng = GameRandom(seed, SPAWN_SPREAD)
+
+        self.state = SimState(1)
+        self.state.ResetRows(np.array([0]))
+
+        blue, red = self.CreatePlayers(blueClass, redClass, decisionInterval)
+
+        self.running = True
+        self.lifetime = 0
+        self.ticks = 0
+        self.playerPhase = False
+
+        # None means the clock ran out
+        self.winner: Optional[Player] = None
+
+        self.towers: List[TowerView] = [TowerView(self, i) for i in range(NUM_TOWERS)]
+
+        blue.kingTower = self.towers[KING_SLOTS[0]]
+        red.kingTower = self.towers[KING_SLOTS[1]]
+
+        self.troopViews = {}
+
+    @property
+    def troops(self) -> List[TroopView]:
+        alive = self.state.entities.alive[0]
+
+        for slot in [slot for slot in self.troopViews if not alive[slot]]:
+            del self.troopViews[slot]
+
+        return list(self.troopViews.values())
+
+    @property
+    def projectiles(self) -> List[ProjectileView]:
+        p = self.state.projectiles
+
+        return [
+            (AOEProjectileView if p.radius[0, slot] > 0 else ProjectileView)(self, slot)
+            for slot in np.flatnonzero(p.alive[0])
+        ]
+
+    def SpawnTroop(self, x, y, troopClass, owner):
+        side = self.players.index(owner)
+
+        if troopClass is Fireball:
+            self.state.SpawnSpells(np.array([0]), np.array([side]), np.array([x]), np.array([y]))
+            return
+
+        slot = int(self.state.SpawnUnits([0], [UNIT_TYPE_BY_CLASS[troopClass].value], [side], [x], [y])[0])
+
+        self.troopViews[slot] = TroopView(self, slot)
+
+    def Tick(self, dt: float) -> None:
+        if not self.running:
+            return
+
+        self.lifetime += dt
+        self.ticks += 1
+
+        if self.lifetime > GAME_LENGTH:
+            self.GameOver()
+            return
+
+        for p in self.players:
+            p.elixir = min(MAX_ELIXIR, p.elixir + ELIXIR_PER_SECOND * dt)
+
+        self.playerPhase = True
+
+        for player in self.players:
+            TickPlayer(player, dt)
+
+        self.playerPhase = False
+
+        kingDied = self.state.Step(dt)[0]
+
+        if kingDied[0]:
+            self.GameOver(self.players[1])
+        elif kingDied[1]:
+            self.GameOver(self.players[0])
@@ -1,41 +1,96 @@
-from pygame import time
-from clash.game import Game
-from clash.gui import GUI
+from clash.game import Game, FIXED_DT
+from clash.replay import ReplayRecorder, ReplayReader
+from clash.profiler import TickProfiler
 from agent import *
 import time as t
 
-FIXED_DT = 1/60
 TIMESCALE = 1
 
 RENDER_GAME = False
 
+# Draw in a separate process from snapshots so the game runs at TIMESCALE (0 for flat out) instead
+# of being held to the window's frame rate
+ASYNC_RENDER = False
+
+# Set to a path to save the game as a replay
+RECORD_REPLAY = None
+
+# Set to a path to watch a saved replay instead of running the agents
+PLAY_REPLAY = None
+
+# Print where the time went in each part of the tick
+PROFILE = False
+
 def main():
     startTime = t.perf_counter_ns()
 
     # Create core game instance
-    game = Game(Agent, Agent)
-    
-    # Create and attach GUI observer
+    reader = None
+
+    if PLAY_REPLAY:
+        reader = ReplayReader(PLAY_REPLAY)
+        game = reader.Start()
+    else:
+        game = Game(Agent, Agent)
+
+    # Create and attach GUI observer, pygame is only imported when there's something to draw
     if RENDER_GAME:
-        gui = GUI()
+        from clash.gui import GUI
+        from pygame import time
+
+        gui = GUI(prewarm=True)
         game.AddObserver(gui)
 
+        clock = time.Clock()
+
+    renderer = None
+
+    if ASYNC_RENDER:
+        from clash.snapshots import AsyncRenderer
+
+        renderer = AsyncRenderer()
+        game.AddObserver(renderer.publisher)
+
+    if RECORD_REPLAY:
+        game.AddObserver(ReplayRecorder(RECORD_REPLAY))
+
+    if PROFILE:
+        game.profiler = TickProfiler()
+
+    loopStart = t.perf_counter()
+
     # Main game loop
-    clock = time.Clock()
     while game.running:
         dt = FIXED_DT
 
         if RENDER_GAME:
             dt = clock.tick(60) / 1000 * TIMESCALE
 
-            for observer in game.observers:
-                observer.Tick(dt, game)
+        # Keep game time from getting ahead of TIMESCALE x real time
+        elif renderer and TIMESCALE:
+            ahead = game.lifetime / TIMESCALE - (t.perf_counter() - loopStart)
 
-        game.Tick(dt)
+            if ahead > 0:
+                t.sleep(ahead)
+
+        for observer in game.observers:
+            observer.Tick(dt, game)
+
+        if reader:
+            reader.Step(game)
+        else:
+            game.Tick(dt)
 
     endTime = t.perf_counter_ns()
 
+    # Waits for the renderer to show the end of the game
+    if renderer:
+        renderer.Close()
+
     print(f"Simulating 1 game took {round((endTime - startTime)/1e6, 2)}ms.")
 
+    if PROFILE:
+        print(game.profiler.Summary())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
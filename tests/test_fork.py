@@ -0,0 +1,22 @@
+from clash.game import Game, FIXED_DT
+from clash.benchmark import PushPlayer, SkarmyPlayer
+
+def State(game):
+    return (game.ticks, [tower.health for tower in game.towers],
+            [(type(troop), troop.x, troop.y, troop.health) for troop in game.troops])
+
+# A fork carries on exactly like the game it came from, without touching it
+def test_fork_plays_the_same():
+    game = Game(PushPlayer, SkarmyPlayer, verbose=False, seed=4)
+
+    for _ in range(1200):
+        game.Tick(FIXED_DT)
+
+    fork = game.Fork()
+
+    for _ in range(1200):
+        game.Tick(FIXED_DT)
+        fork.Tick(FIXED_DT)
+
+    assert game.troops
+    assert State(fork) == State(game)
@@ -0,0 +1,17 @@
+from clash.game import Game, Player
+from clash.vectorized import VectorizedGame
+from clash.troops import Fireball
+import pytest
+
+# Blue's king tower to red's left princess tower is ~365 units, several seconds at Fireball speed
+@pytest.mark.parametrize("gameClass", [Game, VectorizedGame])
+def test_long_fireball_lands(gameClass):
+    game = gameClass(Player, Player, verbose=False, seed=0)
+    tower = game.towers[3]
+
+    game.SpawnTroop(tower.x, tower.y, Fireball, game.players[0])
+
+    for _ in range(600):
+        game.Tick(1/60)
+
+    assert tower.health == tower.maxHealth - Fireball.stats.damage
@@ -0,0 +1,31 @@
+from clash.game import Game, FIXED_DT
+from clash.replay import ReplayRecorder, ReplayReader
+from clash.benchmark import PushPlayer
+
+def State(game):
+    return (game.ticks, [tower.health for tower in game.towers],
+            [(type(troop), troop.x, troop.y, troop.health) for troop in game.troops])
+
+# Re-simulating a replay, from the start or from a keyframe, ends up where the recorded game did
+def test_replay_matches_game(tmp_path):
+    path = str(tmp_path / "game.rep")
+
+    game = Game(PushPlayer, PushPlayer, verbose=False, seed=2)
+    recorder = ReplayRecorder(path, keyframeInterval=1200)
+    game.AddObserver(recorder)
+
+    middle = None
+
+    while game.running:
+        recorder.Tick(FIXED_DT, game)
+        game.Tick(FIXED_DT)
+
+        if game.ticks == 3000:
+            middle = State(game)
+
+    reader = ReplayReader(path)
+
+    assert reader.endTick == game.ticks
+    assert reader.winner == (game.players.index(game.winner) if game.winner else -1)
+    assert State(reader.Simulate()) == State(game)
+    assert State(reader.Seek(3000)) == middle
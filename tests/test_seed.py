@@ -0,0 +1,17 @@
+from clash.game import Game, FIXED_DT
+from clash.vectorized import VectorizedGame
+from clash.benchmark import PushPlayer
+import pytest
+
+def Play(gameClass, seed):
+    game = gameClass(PushPlayer, PushPlayer, verbose=False, seed=seed)
+
+    while game.running:
+        game.Tick(FIXED_DT)
+
+    return game.players.index(game.winner) if game.winner else None, game.ticks
+
+# Everything random comes from the seed, so the same seed is the same game
+@pytest.mark.parametrize("gameClass", [Game, VectorizedGame])
+def test_same_seed_same_game(gameClass):
+    assert Play(gameClass, 7) == Play(gameClass, 7)
@@ -0,0 +1,12 @@
+from clash.game import Game, FIXED_DT
+from clash.benchmark import PushPlayer, SkarmyPlayer
+
+# Dying takes a troop out of its target's targeters, so nothing keeps dead troops around
+def test_no_dead_targeters():
+    game = Game(SkarmyPlayer, PushPlayer, verbose=False, seed=1)
+
+    while game.running:
+        game.Tick(FIXED_DT)
+
+        for troop in game.troops:
+            assert not any(targeter.dead for targeter in troop.targeters)